@@ -0,0 +1,183 @@
+"""Benchmark de carga e latência do dashboard contra o webhook falso do N8N.
+
+Cada cenário (tamanho da resposta x formato) roda em um subprocesso próprio, com
+cache e base de leads vazios, dirigindo o app pelo AppTest do Streamlit:
+
+    python benchmarks/bench_dashboard.py                       # 10, 1k e 50k leads
+    python benchmarks/bench_dashboard.py --sizes 10 1000 --shapes list data single
+    python benchmarks/bench_dashboard.py --shapes data ndjson --latency 5   # streaming x agregado
+    python benchmarks/bench_dashboard.py --save-baseline       # grava benchmarks/baseline.json
+    python benchmarks/bench_dashboard.py --tolerance 0.25      # falha se piorar mais de 25%
+
+Métricas por cenário:
+    first_lead_s  clique em "Iniciar Busca" até o primeiro lead aparecer na sessão
+    search_s      clique em "Iniciar Busca" até os leads estarem na sessão
+    leads_per_s   vazão da ingestão (leads / search_s)
+    rerun_s       mediana de um rerun completo do script com os leads carregados
+    tab_<nome>_s  tempo de renderização de cada aba no último rerun
+    peak_rss_mb   pico de memória do processo
+"""
+
+import argparse
+import json
+import logging
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DASHBOARD = os.path.join(os.path.dirname(BENCH_DIR), "dashboard_teste.py")
+BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+DEFAULT_SIZES = [10, 1000, 50000]
+DEFAULT_SHAPES = ['data']
+HIGHER_IS_BETTER = {'leads_per_s'}
+
+
+def peak_rss_mb():
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def run_scenario(size, shape, latency, reruns, timeout):
+    """Executa um cenário neste processo e retorna as métricas"""
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    sys.path.insert(0, BENCH_DIR)
+    from fake_n8n import iniciar_servidor
+    from streamlit.testing.v1 import AppTest
+
+    os.environ['LEADGEN_CACHE_DIR'] = tempfile.mkdtemp(prefix="leadgen-bench-")
+    if shape == 'ndjson':
+        os.environ['LEADGEN_STREAM'] = "1"
+    server, url = iniciar_servidor(leads=size, shape=shape, latency=latency, seed=size)
+    os.environ['LEADGEN_WEBHOOK_URL'] = url
+    expected = 1 if shape == 'single' else size
+
+    at = AppTest.from_file(DASHBOARD, default_timeout=timeout)
+    at.run()
+    at.sidebar.text_input[0].set_value(f"bench{size}").run()
+
+    started = time.perf_counter()
+    next(b for b in at.button if 'Iniciar' in b.label).click().run()
+    deadline = started + timeout
+    first_lead_s = None
+    while len(at.session_state.leads_data) < expected:
+        if first_lead_s is None and len(at.session_state.leads_data):
+            first_lead_s = time.perf_counter() - started
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        if time.perf_counter() > deadline:
+            raise TimeoutError(f"{len(at.session_state.leads_data)}/{expected} leads após {timeout}s")
+        time.sleep(0.1)
+        at.run()
+    search_s = time.perf_counter() - started
+    if first_lead_s is None:
+        first_lead_s = search_s
+
+    rerun_times = []
+    for _ in range(reruns):
+        t0 = time.perf_counter()
+        at.run()
+        rerun_times.append(time.perf_counter() - t0)
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    metrics = {
+        'first_lead_s': round(first_lead_s, 4),
+        'search_s': round(search_s, 4),
+        'leads_per_s': round(expected / search_s, 1),
+        'rerun_s': round(statistics.median(rerun_times), 4),
+    }
+    for tab, seconds in at.session_state.render_timings.items():
+        metrics[f'tab_{tab}_s'] = round(seconds, 4)
+    metrics['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    server.shutdown()
+    return metrics
+
+
+def run_in_subprocess(size, shape, args):
+    cmd = [sys.executable, os.path.abspath(__file__), '--run-one', str(size), shape,
+           '--latency', str(args.latency), '--reruns', str(args.reruns), '--timeout', str(args.timeout)]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"cenário {size}/{shape} falhou:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline, tolerance, min_delta):
+    """Linhas de comparação com o baseline e a lista de regressões acima da tolerância"""
+    lines, regressions = [], []
+    for scenario, metrics in results.items():
+        base = baseline.get(scenario, {})
+        for name, value in metrics.items():
+            ref = base.get(name)
+            if not ref:
+                lines.append(f"  {scenario:<14} {name:<20} {value:>12}")
+                continue
+            change = (value - ref) / ref
+            worse = -change if name in HIGHER_IS_BETTER else change
+            # Tempos de poucos milissegundos oscilam demais para uma comparação relativa
+            noise = name.endswith('_s') and abs(value - ref) < min_delta
+            flag = "  << REGRESSÃO" if worse > tolerance and not noise else ""
+            lines.append(f"  {scenario:<14} {name:<20} {value:>12} (baseline {ref}, {change:+.0%}){flag}")
+            if flag:
+                regressions.append(f"{scenario} {name}")
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do dashboard contra o webhook falso do N8N")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--shapes', nargs='+', default=DEFAULT_SHAPES, choices=['list', 'data', 'single', 'ndjson'])
+    parser.add_argument('--latency', type=float, default=0.0, help="latência simulada do webhook (s)")
+    parser.add_argument('--reruns', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=600)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.2, help="piora relativa tolerada (0.2 = 20%%)")
+    parser.add_argument('--min-delta', type=float, default=0.02,
+                        help="diferença absoluta mínima (s) para um tempo contar como regressão")
+    parser.add_argument('--output', help="grava os resultados em JSON")
+    parser.add_argument('--run-one', nargs=2, metavar=('SIZE', 'SHAPE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        size, shape = int(args.run_one[0]), args.run_one[1]
+        print(json.dumps(run_scenario(size, shape, args.latency, args.reruns, args.timeout)))
+        return 0
+
+    results = {}
+    for shape in args.shapes:
+        for size in args.sizes:
+            scenario = f"{shape}-{size}"
+            print(f"▶ {scenario}...", flush=True)
+            results[scenario] = run_in_subprocess(size, shape, args)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    lines, regressions = compare(results, baseline, args.tolerance, args.min_delta)
+    print("\n".join(lines))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline salvo em {args.baseline}")
+    elif regressions:
+        print(f"\n{len(regressions)} regressões acima de {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""Webhook local que imita o fluxo do N8N, para benchmarks e desenvolvimento sem a instância real.
+
+Uso:
+    python benchmarks/fake_n8n.py --port 8765 --leads 1000 --latency 0.5 --shape data
+    LEADGEN_WEBHOOK_URL=http://127.0.0.1:8765/webhook streamlit run dashboard_teste.py
+
+Os parâmetros também podem ir na query string da URL, o que permite mudar o
+tamanho da resposta sem reiniciar o servidor:
+    http://127.0.0.1:8765/webhook?leads=50000&shape=list&latency=0
+
+Formatos da resposta (todos aceitos por extrair_leads):
+    list    -> {"leads": [...]}
+    data    -> {"leads": {"data": [...]}}
+    single  -> {"leads": {...}}  (sempre um lead)
+    ndjson  -> um lead por linha, em chunked transfer; a latência é distribuída entre os leads,
+               como se cada análise terminasse em sequência (use com LEADGEN_STREAM=1)
+"""
+
+import argparse
+import gzip
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SHAPES = ('list', 'data', 'single', 'ndjson')
+
+NOMES = ["Ana", "João", "Márcia", "José", "Luíza", "Paulo", "Fernanda", "Sérgio", "Beatriz", "André"]
+CARGOS = ["CEO", "CMO", "Diretor Comercial", "Diretora de Marketing", "Head de Vendas", "Gerente de TI", "Fundador"]
+EMPRESAS = ["Acme", "Nuvem Tech", "Varejo Brasil", "Saúde+", "Logística Já", "Edu Online", "Imóveis SP"]
+CIDADES = ["São Paulo", "Rio de Janeiro", "Belo Horizonte", "Curitiba", "Recife", "Brasília"]
+ANALISES = [
+    "Potencial ALTO: decisor com orçamento e fit com o produto.",
+    "Potencial MÉDIO: influenciador na área, vale nutrir.",
+    "Potencial BAIXO: cargo fora do perfil ideal.",
+]
+
+
+def gerar_leads(n, page=0, seed=0):
+    """Leads sintéticos determinísticos; links únicos por (seed, página, posição)"""
+    rng = random.Random(f"{seed}-{page}")
+    leads = []
+    for i in range(n):
+        nome = rng.choice(NOMES)
+        cargo = rng.choice(CARGOS)
+        empresa = rng.choice(EMPRESAS)
+        cidade = rng.choice(CIDADES)
+        leads.append({
+            'titulo': f"{nome} - {cargo} - {empresa} | LinkedIn",
+            'link': f"https://br.linkedin.com/in/{nome.lower()}-{seed}-{page}-{i}",
+            'resumo': f"{cargo} na {empresa}, {cidade}. Experiência em crescimento e vendas B2B.",
+            'analise': rng.choice(ANALISES),
+        })
+    return leads
+
+
+def montar_resposta(leads, shape):
+    if shape == 'list':
+        return {'leads': leads}
+    if shape == 'data':
+        return {'leads': {'data': leads}}
+    return {'leads': leads[0] if leads else {}}
+
+
+class FakeN8NHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    defaults = {'leads': 10, 'shape': 'data', 'latency': 0.0, 'seed': 0}
+    requests_served = 0
+
+    def _param(self, query, name, cast):
+        values = query.get(name)
+        return cast(values[0]) if values else cast(self.defaults[name])
+
+    def do_POST(self):
+        query = parse_qs(urlparse(self.path).query)
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        payload = json.loads(body or b'{}')
+
+        n = self._param(query, 'leads', int)
+        shape = self._param(query, 'shape', str)
+        latency = self._param(query, 'latency', float)
+        seed = self._param(query, 'seed', int)
+        leads = gerar_leads(1 if shape == 'single' else n, payload.get('start_page', 0), seed)
+        if shape == 'ndjson':
+            self._responder_ndjson(leads, latency)
+            return
+        if latency:
+            time.sleep(latency)
+
+        out = json.dumps(montar_resposta(leads, shape), ensure_ascii=False).encode('utf-8')
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            out = gzip.compress(out, compresslevel=1)
+            encoding = 'gzip'
+        else:
+            encoding = None
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+        type(self).requests_served += 1
+
+    def _responder_ndjson(self, leads, latency):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for lead in leads:
+            if latency:
+                time.sleep(latency / len(leads))
+            line = (json.dumps(lead, ensure_ascii=False) + "\n").encode('utf-8')
+            self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+        type(self).requests_served += 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+def iniciar_servidor(port=0, **defaults):
+    """Sobe o servidor em uma thread; retorna (server, url). port=0 escolhe uma porta livre"""
+    handler = type('Handler', (FakeN8NHandler,), {'defaults': {**FakeN8NHandler.defaults, **defaults}})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="fake-n8n").start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/webhook"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--leads', type=int, default=10, help="leads por página")
+    parser.add_argument('--latency', type=float, default=0.0, help="segundos de espera por requisição")
+    parser.add_argument('--shape', choices=SHAPES, default='data')
+    args = parser.parse_args()
+
+    server, url = iniciar_servidor(args.port, leads=args.leads, latency=args.latency, shape=args.shape)
+    print(f"Webhook falso do N8N em {url} ({args.leads} leads, {args.latency}s, formato '{args.shape}')")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,156 @@
 import streamlit as st
-import requests
-import pandas as pd
 import time
 import json
+import os
+import hashlib
+import math
+import uuid
+from contextlib import contextmanager
 from datetime import datetime
 
+from lead_generator.analytics import AnalyticsStore
+from lead_generator.cache import ResponseCache
+from lead_generator.campaigns import CampaignRunner, itens_da_grade, itens_do_csv
+from lead_generator.client import WebhookClient
+from lead_generator.config import (
+    ANALYTICS_PATH, CACHE_DIR, CACHE_TTL_SECONDS, CAMPAIGN_CONCURRENCY, CAMPAIGN_DIR, CAMPAIGN_MAX_CONCURRENCY,
+    CAMPAIGN_MAX_RATE_PER_MINUTE, CAMPAIGN_RATE_PER_MINUTE, EXPORT_DIR, LEAD_STORE_PATH, MAX_CONCURRENT_PAGES,
+    METRICS_DIR, SAVED_SEARCH_PATH, SESSION_DIR, SESSION_MEMORY_BUDGET_BYTES, STREAM_RESPONSES, WEBHOOK_URL,
+)
+from lead_generator.core import (
+    LOCALIZACOES, POTENCIAIS, SETORES, contar_potencial_leads, mesclar_leads, montar_payload, montar_query,
+    normalizar_link,
+)
+from lead_generator.exports import EXPORT_FORMATS, ExportCache, escrever_exportacao, formatos_exportacao
+from lead_generator.history import HistoryEntry, SessionHistory
+from lead_generator.index import LeadSearchIndex
+from lead_generator.jobs import SearchJob, SearchJobManager
+from lead_generator.metrics import Metrics
+from lead_generator.results import SharedResults
+from lead_generator.saved import SavedSearchScheduler, SavedSearchStore
+from lead_generator.search import SearchService
+from lead_generator.spill import SpillStore, SpilledLeads
+from lead_generator.store import LeadStore
+from lead_generator.table import (
+    LEAD_SEARCH_COLUMNS, anexar_tabela_leads, contar_potencial, memoria_leads, montar_tabela_leads,
+    registro_da_tabela, tabela_de_registros,
+)
+
+# O pandas só é importado quando há leads ou histórico para mostrar (ver lead_generator.table)
+
+# Campanhas em lote
+CAMPAIGN_POLL_SECONDS = 3
+CAMPAIGN_STATUS_LABELS = {
+    'running': '▶️ Em execução',
+    'stopped': '⏸️ Parada',
+    'done': '✅ Concluída',
+}
+
+# Diagnósticos (métricas por fase das buscas)
+METRICS_PHASES = ['cache', 'network', 'json', 'unwrap', 'store', 'classify']
+
+# Classificação dos leads
+POTENCIAL_ICONS = {'ALTO': '🔥', 'MÉDIO': '⚡', 'BAIXO': '📊'}
+POTENCIAL_FILTERS = {'Alto Potencial': 'ALTO', 'Médio Potencial': 'MÉDIO', 'Baixo Potencial': 'BAIXO'}
+
+# Analytics persistente (todas as sessões)
+ANALYTICS_WINDOWS = {'Todo o período': None, 'Últimos 30 dias': 30, 'Últimos 7 dias': 7}
+ANALYTICS_TREND_GRANULARITIES = {'Por dia': 'day', 'Por mês': 'month'}
+ANALYTICS_BREAKDOWNS = {'📍 Localização': 'location', '🏭 Setor': 'sector', '🎯 Cargo': 'term'}
+
+# Buscas salvas
+SAVED_SEARCH_SCHEDULE_OPTIONS = [None] + list(range(24))
+
+# Paginação dos resultados
+RESULTS_PAGE_SIZES = [10, 25, 50, 100]
+HISTORY_PAGE_SIZE = 10
+
+# Fila de buscas em segundo plano
+JOB_POLL_SECONDS = 2
+JOB_FAST_PATH_SECONDS = 0.5
+JOB_STATUS_LABELS = {
+    'queued': '⏳ Na fila',
+    'running': '📡 Buscando',
+    'parsing': '⚙️ Processando',
+    'done': '✅ Concluída',
+    'failed': '❌ Falhou',
+    'cancelled': '🚫 Cancelada',
+}
+
+@st.cache_resource
+def get_job_manager():
+    """Fila de buscas única do processo."""
+    return SearchJobManager()
+
+
+@st.cache_resource
+def get_webhook_client():
+    """Cliente HTTP único do processo (pool de conexões reaproveitado entre reruns e sessões)."""
+    return WebhookClient()
+
+
+@st.cache_resource
+def get_export_cache():
+    """Cache de exportações único do processo."""
+    return ExportCache(EXPORT_DIR)
+
+
+@st.cache_resource
+def get_metrics():
+    """Métricas do processo."""
+    return Metrics(METRICS_DIR)
+
+
+@st.cache_resource
+def get_lead_store():
+    """Base de leads única do processo."""
+    return LeadStore(LEAD_STORE_PATH)
+
+
+@st.cache_resource
+def get_response_cache():
+    """Instância única do cache, compartilhada entre reruns e sessões."""
+    return ResponseCache(os.path.join(CACHE_DIR, "responses.sqlite3"))
+
+
+@st.cache_resource
+def get_shared_results():
+    """Resultados de busca compartilhados entre todas as sessões do processo."""
+    return SharedResults()
+
+
+@st.cache_resource
+def get_saved_searches():
+    """Buscas salvas (compartilhadas entre sessões e com a CLI)."""
+    return SavedSearchStore(SAVED_SEARCH_PATH)
+
+
+@st.cache_resource
+def get_analytics():
+    """Histórico persistente e agregados de todas as buscas do servidor e da CLI."""
+    return AnalyticsStore(ANALYTICS_PATH)
+
+
+@st.cache_resource
+def get_search_service():
+    """Serviço de busca do processo, montado sobre o cliente, o cache, a base de leads e as métricas."""
+    return SearchService(WEBHOOK_URL, get_webhook_client(), get_response_cache(), get_lead_store(), get_metrics(),
+                         get_shared_results(), get_saved_searches(), get_analytics())
+
+
+@st.cache_resource
+def get_saved_search_scheduler():
+    """Agendador único do processo para as atualizações diárias das buscas salvas."""
+    return SavedSearchScheduler(get_saved_searches(), get_search_service(), MAX_CONCURRENT_PAGES)
+
+
+def spill_da_sessao():
+    """Arquivo em disco desta sessão (histórico antigo e leads acima do orçamento), criado no primeiro uso"""
+    if st.session_state.get('spill') is None:
+        st.session_state.spill = SpillStore(os.path.join(SESSION_DIR, f"{st.session_state.session_id}.sqlite3"))
+    return st.session_state.spill
+
+
 # Configuração da página
 st.set_page_config(
     page_title="LinkedIn Lead Generator",
@@ -49,9 +195,6 @@ st.markdown('<h1 class="main-header">🎯 LinkedIn Lead Generator</h1>', unsafe_
 # Sidebar - Configurações
 st.sidebar.header("🔍 Parâmetros de Busca")
 
-# URL do webhook (oculto)
-webhook_url = "https://n8n.srv845413.hstgr.cloud/webhook/linkedin-leads-claude"
-
 # Campo livre para cargos
 executive_input = st.sidebar.text_input(
     "🎯 Cargos/Termos de Busca",    
@@ -59,32 +202,16 @@ executive_input = st.sidebar.text_input(
 )
 
 # Filtro por Setor
+sector_options = SETORES
+
 sector_filter = st.sidebar.selectbox(
     "🏭 Setor/Indústria",
-    [
-        "Todos os setores",
-        "Tecnologia/SaaS",
-        "E-commerce/Varejo", 
-        "Serviços Financeiros",
-        "Saúde/Farmacêutico",
-        "Educação/EdTech",
-        "Imobiliário/PropTech",
-        "Manufatura/Indústria",
-        "Consultoria/Serviços",
-        "Marketing/Agências",
-        "Logística/Transporte"
-    ],
+    sector_options,
     index=0
 )
 
 # Localização expandida
-location_options = [
-    "Brasil",
-    "São Paulo", "Rio de Janeiro", "Belo Horizonte", "Porto Alegre", "Salvador",
-    "Brasília", "Fortaleza", "Recife", "Curitiba", "Manaus",
-    "Belém", "Goiânia", "Guarulhos", "Campinas", "São Luís",
-    "Maceió", "Campo Grande", "Teresina", "João Pessoa", "Vitória"
-]
+location_options = LOCALIZACOES
 
 location = st.sidebar.selectbox(
     "📍 Localização",
@@ -98,14 +225,36 @@ num_results = st.sidebar.slider("Número de Resultados", 5, 20, 10)
 # Página inicial
 start_page = st.sidebar.number_input("Página Inicial", 0, 50, 0)
 
+# Intervalo de páginas (busca profunda)
+page_range_mode = st.sidebar.checkbox("📚 Buscar intervalo de páginas", help="Busca várias páginas em paralelo e junta os resultados sem duplicados")
+if page_range_mode:
+    end_page = st.sidebar.number_input("Página Final", start_page, 50, min(start_page + 4, 50))
+    max_concurrency = st.sidebar.slider("Requisições simultâneas", 1, 10, MAX_CONCURRENT_PAGES)
+else:
+    end_page = start_page
+    max_concurrency = MAX_CONCURRENT_PAGES
+
 # Área principal dividida em tabs
-tab1, tab2, tab3, tab4 = st.tabs(["🚀 Buscar Leads", "📊 Resultados", "📈 Analytics", "📋 Histórico"])
+tab1, tab2, tab3, tab4, tab5 = st.tabs(["🚀 Buscar Leads", "📊 Resultados", "📈 Analytics", "📋 Histórico", "🗂️ Campanhas"])
 
 # Inicializar session state
 if 'leads_data' not in st.session_state:
     st.session_state.leads_data = []
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+    SpillStore.prune(SESSION_DIR)
 if 'search_history' not in st.session_state:
-    st.session_state.search_history = []
+    st.session_state.search_history = SessionHistory(spill_da_sessao)
+if 'history_visible' not in st.session_state:
+    st.session_state.history_visible = HISTORY_PAGE_SIZE
+if 'search_jobs' not in st.session_state:
+    st.session_state.search_jobs = []
+if 'results_page' not in st.session_state:
+    st.session_state.results_page = 0
+if 'campaigns' not in st.session_state:
+    st.session_state.campaigns = []
+if 'campaign_items_ingested' not in st.session_state:
+    st.session_state.campaign_items_ingested = set()
 
 # Função para repetir busca
 def repeat_search(search_data):
@@ -117,8 +266,563 @@ def repeat_search(search_data):
     # Redirecionar para a tab de busca
     st.info("🔄 Parâmetros da busca anterior carregados! Vá para a aba 'Buscar Leads' e clique em 'Iniciar Busca'.")
 
+def montar_visao_leads(leads):
+    """Tabela, índice, hash e contagens dos leads, classificando e indexando cada lead uma única vez"""
+    anteriores = st.session_state.get('leads_data') or []
+    n = len(anteriores)
+    
+    # Leads chegando em sequência (páginas de um mesmo job): processar só os novos.
+    # Uma visão compartilhada com outras sessões nunca é alterada, então aí a visão é remontada.
+    incremental = (
+        'leads_table' in st.session_state and st.session_state.get('leads_origem', 'sessao') == 'sessao'
+        and 0 < n <= len(leads) and all(a is b for a, b in zip(anteriores, leads[:n]))
+    )
+    if incremental:
+        table, novos = anexar_tabela_leads(st.session_state.leads_table, leads[n:])
+        index = st.session_state.leads_index
+    elif leads:
+        novos = table = montar_tabela_leads(leads)
+        index = LeadSearchIndex()
+        n = 0
+    else:
+        # Sessão sem leads: nada de tabela (e de pandas) até a primeira busca
+        novos = table = None
+        index = LeadSearchIndex()
+        n = 0
+    
+    if novos is not None:
+        for offset, row in enumerate(novos[LEAD_SEARCH_COLUMNS].itertuples(index=False)):
+            index.add(n + offset, *row)
+    
+    # Hash do conteúdo, atualizado só com os leads novos (chave das exportações)
+    digest = st.session_state.leads_digest.copy() if incremental else hashlib.sha256()
+    for lead in leads[n:]:
+        digest.update(json.dumps(lead, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+    
+    counts = contar_potencial(table) if table is not None else {p: 0 for p in POTENCIAIS}
+    return table, index, digest, counts
+
+def definir_leads(leads, resultado=None):
+    """Substitui os leads da sessão; com `resultado` (busca compartilhada), a visão é montada uma vez no processo
+    e a sessão guarda só referências a ela"""
+    if resultado is not None:
+        leads = resultado.leads
+        visao = resultado.derive('visao', lambda: montar_visao_leads(leads))
+    else:
+        visao = montar_visao_leads(leads)
+    
+    table, index, digest, counts = visao
+    st.session_state.leads_digest = digest
+    st.session_state.leads_data = leads
+    st.session_state.leads_table = table
+    st.session_state.leads_index = index
+    st.session_state.potencial_counts = counts
+    st.session_state.leads_origem = 'compartilhada' if resultado is not None else 'sessao'
+    st.session_state.pop('leads_bytes', None)
+
+def aplicar_orcamento_memoria():
+    """Mantém os leads desta sessão dentro do orçamento de memória: acima dele, os leads vão para o disco
+    e só o potencial (categórico) e o índice de busca ficam em memória
+
+    O orçamento conta a tabela, a lista de leads (dicts) e o índice de busca da sessão.
+    """
+    table = st.session_state.leads_table
+    if table is None or st.session_state.get('leads_origem') != 'sessao':
+        return  # resultados compartilhados contam uma vez para o processo, não por sessão
+    if any(not job.finished for job in jobs_da_sessao()):
+        return  # páginas ainda chegando: a tabela cresce de forma incremental
+    if 'leads_bytes' not in st.session_state:
+        st.session_state.leads_bytes = (int(table.memory_usage(deep=True).sum())
+                                        + memoria_leads(st.session_state.leads_data)
+                                        + st.session_state.leads_index.memory_usage())
+    if st.session_state.leads_bytes <= SESSION_MEMORY_BUDGET_BYTES:
+        return
+    
+    spill = spill_da_sessao()
+    spill.write_leads(st.session_state.leads_data)
+    st.session_state.leads_data = SpilledLeads(spill, len(table))
+    st.session_state.leads_table = table[['potencial']].copy()
+    st.session_state.leads_origem = 'disco'
+
+def leads_nas_posicoes(table, posicoes):
+    """Linhas da tabela nas posições pedidas, lidas do disco se os leads da sessão foram para lá"""
+    if 'titulo' in table.columns:
+        return table.iloc[posicoes].to_dict('records')
+    leads = st.session_state.leads_data.spill.read_leads(posicoes)
+    return [registro_da_tabela(lead, potencial) for lead, potencial in zip(leads, table['potencial'].iloc[posicoes])]
+
+def botao_exportacao(build_df, content_key, format_name, file_prefix, label):
+    """Botão de download que só monta a tabela e o arquivo quando clicado e reaproveita exportações idênticas"""
+    fmt = EXPORT_FORMATS[format_name]
+    key = hashlib.sha256(f"{content_key}|{fmt['ext']}".encode('utf-8')).hexdigest()
+    export_cache = get_export_cache()
+    
+    def gerar():
+        # Roda em outra thread, no clique. O arquivo é gravado em blocos, mas o download do Streamlit
+        # é servido da memória: o conteúdo inteiro é lido aqui (e o arquivo fechado)
+        path = export_cache.get_or_build(key, fmt['ext'], lambda tmp: escrever_exportacao(build_df(), tmp, fmt['ext']))
+        with open(path, 'rb') as f:
+            return f.read()
+    
+    st.download_button(
+        label=label,
+        data=gerar,
+        file_name=f"{file_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt['ext']}",
+        mime=fmt['mime'],
+        on_click="ignore"
+    )
+
+@contextmanager
+def medir_renderizacao(nome):
+    """Tempo de renderização de um bloco da página, guardado em st.session_state.render_timings"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        st.session_state.render_timings[nome] = time.perf_counter() - inicio
+        get_metrics().add_render(nome, st.session_state.render_timings[nome])
+
+def contadores_externos():
+    """Contadores do cache e do cliente HTTP para a exportação Prometheus"""
+    cache_stats = get_response_cache().stats
+    client_stats = get_webhook_client().stats
+    return [
+        ('leadgen_cache_hits_total', {'tier': 'memory'}, cache_stats['memory_hits'], "Acertos do cache de respostas"),
+        ('leadgen_cache_hits_total', {'tier': 'disk'}, cache_stats['disk_hits'], "Acertos do cache de respostas"),
+        ('leadgen_cache_misses_total', {}, cache_stats['misses'], "Faltas do cache de respostas"),
+        ('leadgen_webhook_requests_total', {}, client_stats['requests'], "Requisições ao webhook do N8N"),
+        ('leadgen_webhook_retries_total', {}, client_stats['retries'], "Retentativas de requisições ao webhook"),
+        ('leadgen_webhook_failures_total', {}, client_stats['failures'], "Requisições ao webhook que falharam"),
+    ]
+
+def finalizar_trace(trace, **fields):
+    """Fecha o trace da busca e atualiza o arquivo Prometheus"""
+    if trace is None:
+        return
+    metrics = get_metrics()
+    metrics.finish_trace(trace, **fields)
+    metrics.write_prometheus(contadores_externos())
+
+def painel_diagnosticos():
+    """Painel oculto (?diag=1 ou LEADGEN_DIAGNOSTICS=1) com o detalhamento das últimas buscas"""
+    metrics = get_metrics()
+    def ler_logs():
+        with open(metrics.log_path, 'rb') as f:
+            return f.read()
+    
+    with st.sidebar.expander("⚙️ Diagnósticos"):
+        # A coleta vale para o processo inteiro (todas as sessões e jobs): só LEADGEN_DIAGNOSTICS=1 a liga
+        if metrics.enabled:
+            st.caption("Coleta de métricas ligada (LEADGEN_DIAGNOSTICS=1)")
+        else:
+            st.caption("Coleta de métricas desligada: inicie o servidor com LEADGEN_DIAGNOSTICS=1 para registrar as buscas")
+        
+        traces = list(metrics.traces)
+        if traces:
+            st.caption("Tempo por fase (s) das últimas buscas · fases de páginas paralelas são somadas")
+            rows = []
+            for trace in reversed(traces):
+                row = {'busca': trace['label'], 'hora': trace['timestamp'][11:], 'total': round(trace['total'], 3)}
+                row.update({phase: round(trace['spans'].get(phase, 0.0), 3) for phase in METRICS_PHASES})
+                row['leads'] = trace.get('leads', 0)
+                if 'first_lead' in trace['spans']:
+                    row['1º lead'] = round(trace['spans']['first_lead'], 3)
+                row['KB recebidos'] = round(trace['counters'].get('bytes_received', 0) / 1024, 1)
+                row['acertos cache'] = trace['counters'].get('cache_hits', 0)
+                row['retries'] = trace['counters'].get('retries', 0)
+                rows.append(row)
+            import pandas as pd
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+        else:
+            st.caption("Nenhuma busca instrumentada ainda.")
+        
+        if st.session_state.get('render_timings'):
+            st.caption("Renderização no último rerun: " + " · ".join(
+                f"{tab} {seconds * 1000:.0f} ms" for tab, seconds in st.session_state.render_timings.items()
+            ))
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("📈 Prometheus", data=lambda: metrics.prometheus_text(contadores_externos()),
+                               file_name="leadgen.prom", mime="text/plain", on_click="ignore")
+        with col2:
+            if os.path.exists(metrics.log_path):
+                st.download_button("🧾 Logs JSON", data=ler_logs,
+                                   file_name="searches.ndjson", mime="application/x-ndjson", on_click="ignore")
+        st.caption(f"Arquivos: {metrics.prometheus_path} · {metrics.log_path}")
+
+def mudar_pagina_resultados(delta):
+    """Callback dos botões anterior/próxima da lista de resultados"""
+    st.session_state.results_page = max(0, st.session_state.results_page + delta)
+
+def registrar_busca(payload, leads, resultado=None):
+    """Salva os leads no session state e adiciona a busca ao histórico"""
+    # Salvar no session state (classificação feita uma vez, na ingestão)
+    definir_leads(leads, resultado)
+    adicionar_historico(payload, leads, st.session_state.potencial_counts)
+
+def adicionar_historico(payload, leads, counts):
+    """Adiciona a busca ao histórico com estatísticas detalhadas (taxa de conversão = alto potencial / total)"""
+    st.session_state.search_history.append(
+        HistoryEntry.from_search(datetime.now().strftime("%Y-%m-%d %H:%M:%S"), payload, len(leads), counts)
+    )
+
+def payload_do_historico(search_params):
+    """Reconstrói o payload do N8N a partir dos parâmetros salvos no histórico"""
+    executive_terms = [t.strip() for t in search_params.get('executive_terms', '').split(',') if t.strip()]
+    sector = search_params.get('sector', 'Todos os setores')
+    location = search_params.get('location', 'Brasil')
+    return montar_payload(executive_terms, sector, location,
+                          search_params.get('num_results', 10), search_params.get('start_page', 0))
+
+def enfileirar_busca(payload, end_page=None, max_workers=MAX_CONCURRENT_PAGES, saved_id=None):
+    """Envia a busca para a fila em segundo plano; respostas rápidas (cache) já entram nesta execução
+
+    Com `saved_id`, é uma atualização da busca salva: vai ao N8N sem cache e só os perfis ainda não
+    vistos por ela são analisados e marcados como novos.
+    """
+    if end_page is None or end_page < payload['start_page']:
+        end_page = payload['start_page']
+    stream = st.session_state.get('stream_responses', STREAM_RESPONSES)
+    if saved_id is not None:
+        job = SearchJob(payload, end_page, max_workers, send_known=True, fresh=True, saved_id=saved_id, stream=stream)
+    else:
+        job = SearchJob(payload, end_page, max_workers, st.session_state.get('send_known_profiles', True),
+                        max_age=st.session_state.get('cache_max_age_hours', CACHE_TTL_SECONDS / 3600) * 3600,
+                        stream=stream)
+    job.trace = get_metrics().start_trace(f"{', '.join(payload['executive_terms'])} · {payload['location']}")
+    get_job_manager().submit(job, get_search_service().run_job)
+    st.session_state.search_jobs.append(job.id)
+    job.done_event.wait(JOB_FAST_PATH_SECONDS)
+    processar_jobs()
+    return job
+
+def salvar_e_atualizar(payload, end_page):
+    """Salva a busca (com as páginas já em cache como ponto de partida) e enfileira uma atualização"""
+    saved_searches = get_saved_searches()
+    saved_id = SavedSearchStore.make_id(payload, end_page)
+    if saved_searches.get(saved_id) is None:
+        saved_searches.save(payload, end_page, get_search_service().cached_leads(payload, end_page))
+    return enfileirar_busca(payload, end_page, saved_id=saved_id)
+
+def painel_analytics():
+    """Tendências de todas as buscas já feitas, lidas dos agregados mantidos a cada busca"""
+    analytics = get_analytics()
+    window_label = st.radio("Período", list(ANALYTICS_WINDOWS), horizontal=True, key="analytics_window")
+    days = ANALYTICS_WINDOWS[window_label]
+    summary = analytics.summary(days)
+    if not summary['searches']:
+        st.info("📝 Nenhuma busca registrada neste período.")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Buscas", summary['searches'])
+    with col2:
+        st.metric("Leads", summary['leads'])
+    with col3:
+        st.metric("Média por Busca", summary['leads_per_search'])
+    with col4:
+        st.metric("Taxa Conversão Média", f"{summary['conversion_rate']}%")
+    
+    # Conversão ao longo do tempo
+    granularity = ANALYTICS_TREND_GRANULARITIES[
+        st.radio("Tendência de conversão", list(ANALYTICS_TREND_GRANULARITIES), horizontal=True, key="analytics_trend")
+    ]
+    trend = analytics.conversion_trend(granularity)
+    st.line_chart(
+        {'Conversão (%)': [row['conversion_rate'] for row in trend], 'Período': [row['period'] for row in trend]},
+        x='Período', y='Conversão (%)'
+    )
+    
+    # Melhores combinações cargo × local
+    st.write("**🏆 Melhores combinações cargo × local:**")
+    top_cells = analytics.top_cells(days)
+    st.dataframe(
+        [{'Cargo': cell['term'], 'Local': cell['location'], 'Buscas': cell['searches'],
+          'Leads/busca': cell['leads_per_search'], 'Conversão (%)': cell['conversion_rate']} for cell in top_cells],
+        hide_index=True, use_container_width=True
+    )
+    
+    # Performance por dimensão
+    for label, dimension in ANALYTICS_BREAKDOWNS.items():
+        st.write(f"**{label}:**")
+        for row in analytics.breakdown(dimension, days, limit=10):
+            st.write(f"- {row['value']}: {row['leads_per_search']} leads/busca ({row['conversion_rate']}% conversão, "
+                     f"{row['searches']} buscas)")
+
+def painel_buscas_salvas():
+    """Buscas salvas com agendamento, atualização manual e os perfis novos da última atualização"""
+    saved_searches = get_saved_searches()
+    searches = saved_searches.list()
+    if not searches:
+        st.caption("Use 🔄 Repetir Busca no histórico para salvar uma busca e acompanhar só os perfis novos.")
+        return
+    
+    for saved in searches[:20]:
+        payload = saved['payload']
+        with st.container(border=True):
+            col1, col2, col3 = st.columns([3, 1, 1])
+            with col1:
+                st.write(f"**{', '.join(payload['executive_terms'])}** · {payload['sector']} · {payload['location']} · "
+                         f"págs. {payload['start_page']}-{saved['end_page']}")
+                if saved['last_run_at']:
+                    last_run = datetime.fromtimestamp(saved['last_run_at']).strftime("%Y-%m-%d %H:%M")
+                    st.caption(f"Última atualização em {last_run}: {saved['last_total']} leads · 🆕 {saved['last_new']} novos")
+                else:
+                    st.caption("Ainda não atualizada.")
+            with col2:
+                hour = st.selectbox(
+                    "Agendamento", SAVED_SEARCH_SCHEDULE_OPTIONS,
+                    index=SAVED_SEARCH_SCHEDULE_OPTIONS.index(saved['schedule_hour']),
+                    format_func=lambda h: "Manual" if h is None else f"Diária às {h:02d}:00",
+                    key=f"schedule_{saved['id']}"
+                )
+                if hour != saved['schedule_hour']:
+                    saved_searches.set_schedule(saved['id'], hour)
+            with col3:
+                if st.button("🔄 Atualizar agora", key=f"refresh_{saved['id']}"):
+                    enfileirar_busca(payload, saved['end_page'], saved_id=saved['id'])
+                    st.rerun()
+                if saved['last_new'] and st.button("🆕 Ver novos", key=f"new_{saved['id']}"):
+                    definir_leads(saved_searches.last_new_leads(saved['id']))
+                    st.session_state.pop('novos_leads', None)
+                    st.rerun()
+                if st.button("🗑️ Remover", key=f"remove_{saved['id']}"):
+                    saved_searches.remove(saved['id'])
+                    st.rerun()
+
+@st.cache_resource
+def get_campaign_runner():
+    """Executor de campanhas único do processo; retoma campanhas interrompidas ao ser criado."""
+    return CampaignRunner(CAMPAIGN_DIR, get_search_service().run_campaign_item)
+
+def campanhas_da_sessao():
+    """Campanhas acompanhadas por esta sessão"""
+    runner = get_campaign_runner()
+    return [runner.campaigns[c] for c in st.session_state.campaigns if c in runner.campaigns]
+
+def assinatura_campanhas(campaigns):
+    return [(c.id, c.status, len(c.item_results)) for c in campaigns]
+
+def processar_campanhas():
+    """Leva os itens concluídos das campanhas desta sessão para o histórico e a tabela de leads"""
+    campaigns = campanhas_da_sessao()
+    st.session_state.campanhas_assinatura = assinatura_campanhas(campaigns)
+    leads = None
+    for campaign in campaigns:
+        for index, (payload, item_leads) in list(campaign.item_results.items()):
+            key = (campaign.id, index)
+            if key in st.session_state.campaign_items_ingested:
+                continue
+            st.session_state.campaign_items_ingested.add(key)
+            adicionar_historico(payload, item_leads, contar_potencial_leads(item_leads))
+            
+            if leads is None:
+                leads = list(st.session_state.leads_data)
+                vistos = {normalizar_link(l.get('link')) for l in leads} - {''}
+            mesclar_leads(leads, item_leads, vistos)
+    
+    if leads is not None:
+        definir_leads(leads)
+
+def painel_campanhas():
+    """Progresso das campanhas do servidor, com parar/retomar"""
+    runner = get_campaign_runner()
+    campaigns = sorted(runner.campaigns.values(), key=lambda c: c.data['created_at'], reverse=True)
+    if not campaigns:
+        st.info("📝 Nenhuma campanha criada ainda.")
+        return
+    
+    for campaign in campaigns[:20]:
+        progress = campaign.progress()
+        total = len(campaign.data['items'])
+        finished = progress['done'] + progress['failed']
+        with st.container(border=True):
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                st.write(f"**{CAMPAIGN_STATUS_LABELS[campaign.status]}** · Campanha {campaign.id} · "
+                         f"criada em {campaign.data['created_at']} · {campaign.data['rate_per_minute']} req/min")
+                st.progress(finished / total if total else 1.0)
+                st.caption(f"{progress['done']} concluídas · {progress['running']} em andamento · "
+                           f"{progress['pending']} na fila · {progress['failed']} com falha")
+            with col2:
+                if campaign.status == 'running':
+                    if st.button("⏸️ Parar", key=f"stop_{campaign.id}"):
+                        runner.stop(campaign.id)
+                        st.rerun()
+                elif finished < total:
+                    if st.button("▶️ Retomar", key=f"resume_{campaign.id}"):
+                        runner.resume(campaign.id)
+                        if campaign.id not in st.session_state.campaigns:
+                            st.session_state.campaigns.append(campaign.id)
+                        st.rerun()
+                if campaign.id not in st.session_state.campaigns:
+                    if st.button("📥 Acompanhar", key=f"follow_{campaign.id}",
+                                 help="Traz os resultados desta campanha para o histórico e os resultados desta sessão"):
+                        st.session_state.campaigns.append(campaign.id)
+                        st.rerun()
+    
+    # Itens novos nas campanhas acompanhadas: recarregar o app para atualizar as outras abas
+    if assinatura_campanhas(campanhas_da_sessao()) != st.session_state.get('campanhas_assinatura'):
+        st.rerun()
+
+def jobs_da_sessao():
+    """Jobs desta sessão ainda mantidos pela fila, do mais antigo para o mais novo"""
+    manager = get_job_manager()
+    return [j for j in (manager.get(job_id) for job_id in st.session_state.search_jobs) if j is not None]
+
+def assinatura_jobs(jobs):
+    return [(j.id, j.finished, len(j.leads)) for j in jobs]
+
+def processar_jobs():
+    """Incorpora ao session state os resultados dos jobs desta sessão"""
+    jobs = jobs_da_sessao()
+    st.session_state.jobs_assinatura = assinatura_jobs(jobs)
+    parcial = None
+    for job in jobs:
+        if job.ingested:
+            continue
+        if job.finished:
+            job.ingested = True
+            if job.status == 'done':
+                with get_metrics().span(job.trace, 'classify'):
+                    registrar_busca({**job.payload, "end_page": job.end_page}, job.leads, job.result)
+                if job.new_leads is not None:
+                    # Posições dos perfis novos na tabela que acabou de ser montada (filtro da aba de resultados)
+                    novos = {normalizar_link(lead.get('link')) for lead in job.new_leads}
+                    st.session_state.novos_leads = (
+                        st.session_state.leads_digest.hexdigest(),
+                        [i for i, lead in enumerate(job.leads) if normalizar_link(lead.get('link')) in novos]
+                    )
+            finalizar_trace(job.trace, status=job.status, leads=len(job.leads), pages=job.pages_total)
+        elif job.leads:
+            parcial = job
+    
+    # Leads do intervalo de páginas em andamento aparecem conforme cada página termina
+    if parcial is not None:
+        definir_leads(list(parcial.leads))
+
+def painel_jobs():
+    """Lista os jobs desta sessão com status real e opção de cancelar"""
+    manager = get_job_manager()
+    jobs = jobs_da_sessao()
+    if not jobs:
+        return
+    
+    st.subheader("📋 Fila de Buscas")
+    for job in reversed(jobs[-10:]):
+        terms = ', '.join(job.payload['executive_terms'])
+        pages = (f"pág. {job.payload['start_page']}" if job.pages_total == 1
+                 else f"págs. {job.payload['start_page']}-{job.end_page}")
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            novos = f" · 🆕 {len(job.new_leads)} novos" if job.new_leads is not None else ""
+            st.write(f"**{JOB_STATUS_LABELS[job.status]}** · {terms} · {job.payload['location']} · {pages} · {len(job.leads)} leads{novos}")
+            if not job.finished and job.pages_total > 1:
+                st.progress(job.pages_done / job.pages_total)
+            for error in job.errors:
+                st.caption(f"⚠️ {error}")
+        with col2:
+            if not job.finished and st.button("🚫 Cancelar", key=f"cancel_{job.id}"):
+                manager.cancel(job.id)
+                st.rerun()
+    
+    # Novas páginas ou jobs concluídos desde a última execução: recarregar o app inteiro para atualizar as outras abas
+    if assinatura_jobs(jobs) != st.session_state.get('jobs_assinatura'):
+        st.rerun()
+
+# Cache de buscas
+response_cache = get_response_cache()
+shared_results = get_shared_results()
+with st.sidebar.expander("🗄️ Cache de Buscas"):
+    st.number_input(
+        "Validade do cache (horas)", 0.0, CACHE_TTL_SECONDS / 3600, CACHE_TTL_SECONDS / 3600, step=1.0,
+        key="cache_max_age_hours",
+        help="Suas buscas idênticas dentro deste período são respondidas pelo cache. O limite é a validade "
+             "do cache do servidor (LEADGEN_CACHE_TTL_HOURS), que vale para todas as sessões"
+    )
+    cache_hits = response_cache.stats['memory_hits'] + response_cache.stats['disk_hits']
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Acertos", cache_hits)
+    with col2:
+        st.metric("Faltas", response_cache.stats['misses'])
+    disk_entries, disk_bytes = response_cache.disk_usage()
+    st.caption(f"{response_cache.stats['memory_hits']} em memória · {response_cache.stats['disk_hits']} em disco · "
+               f"{disk_entries} buscas salvas ({disk_bytes / 1024:.0f} KB)")
+    st.caption(f"{len(shared_results)} resultados compartilhados entre sessões · "
+               f"{shared_results.stats['hits']} reaproveitados · {shared_results.stats['coalesced']} requisições agrupadas")
+    if st.button("🗑️ Limpar Cache"):
+        response_cache.clear()
+        shared_results.clear()
+        st.rerun()
+
+# Base de leads
+lead_store = get_lead_store()
+with st.sidebar.expander("🗂️ Base de Leads"):
+    st.checkbox(
+        "Enviar perfis conhecidos ao N8N", value=True, key='send_known_profiles',
+        help="Envia um filtro compacto (Bloom) dos perfis já analisados para o N8N pular a reanálise"
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Perfis na base", lead_store.count())
+    with col2:
+        st.metric("Análises reaproveitadas", lead_store.stats['analise_reused'])
+    st.caption(f"{lead_store.stats['new']} perfis novos · {lead_store.stats['known']} já conhecidos desde o início do servidor")
+    if st.button("📚 Carregar base completa"):
+        definir_leads(lead_store.all_leads())
+        st.rerun()
+
+# Conexão com o webhook
+webhook_client = get_webhook_client()
+with st.sidebar.expander("📡 Conexão N8N"):
+    st.checkbox(
+        "Receber leads em streaming", value=STREAM_RESPONSES, key="stream_responses",
+        help="Lê a resposta do N8N em blocos (NDJSON ou JSON): os leads e os contadores aparecem conforme chegam"
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Requisições", webhook_client.stats['requests'])
+    with col2:
+        st.metric("Retentativas", webhook_client.stats['retries'])
+    latency = webhook_client.latency_summary()
+    if latency:
+        st.caption(f"{latency['count']} tentativas · média {latency['avg']:.1f}s · "
+                   f"mediana {latency['p50']:.1f}s · máx {latency['max']:.1f}s · {webhook_client.stats['failures']} falhas")
+    else:
+        st.caption("Nenhuma requisição feita ainda.")
+    breaker = webhook_client.breaker
+    if breaker.state == 'open':
+        st.caption(f"🔴 Circuito aberto: {breaker.failures} falhas seguidas, nova tentativa em {breaker.retry_in():.0f}s")
+    elif breaker.state == 'half_open':
+        st.caption("🟡 Circuito em teste: aguardando a resposta de uma requisição")
+    else:
+        st.caption(f"🟢 Circuito fechado · {webhook_client.stats['hedges']} hedges "
+                   f"({webhook_client.stats['hedge_wins']} mais rápidos que a original)")
+    for (shape, streamed), count, p50, p95, _ in webhook_client.latency.summary(webhook_client.read_timeout):
+        num_results, sector = shape or ('-', '-')
+        deadline = webhook_client.deadline(shape, streamed)
+        p95_text = f"p95 {p95:.1f}s" if p95 is not None else "p95 -"
+        st.caption(f"{sector or 'sem setor'} · {num_results}/página{' · streaming' if streamed else ''}: "
+                   f"{count} amostras · {p95_text} · prazo {deadline:.0f}s")
+
+if 'leads_table' not in st.session_state:
+    definir_leads(st.session_state.leads_data)
+
+st.session_state.render_timings = {}
+
+# Atualizações agendadas das buscas salvas rodam em segundo plano enquanto o servidor estiver no ar
+get_saved_search_scheduler()
+
+# Resultados de buscas em segundo plano
+processar_jobs()
+processar_campanhas()
+aplicar_orcamento_memoria()
+
 # TAB 1: Buscar Leads
-with tab1:
+with tab1, medir_renderizacao("buscar"):
     st.header("🔍 Nova Busca de Leads")
     
     col1, col2 = st.columns([2, 1])
@@ -130,9 +834,7 @@ with tab1:
         executive_terms = [term.strip() for term in executive_input.split() if term.strip()]
         
         # Preview da query (oculto - só para processamento interno)
-        query_terms = " OR ".join(executive_terms)
-        sector_query = f" {sector_filter.split('/')[0].lower()}" if sector_filter != "Todos os setores" else ""
-        query_preview = f"site:linkedin.com/in ({query_terms}){sector_query} {location}"
+        query_preview = montar_query(executive_terms, sector_filter, location)
         
         # Informações da busca
         st.info(f"""
@@ -141,7 +843,7 @@ with tab1:
         - 🏭 Setor: {sector_filter}
         - 📍 Local: {location}
         - 📊 Resultados: {num_results}
-        - 📄 Página: {start_page}
+        - 📄 Página: {start_page if end_page == start_page else f'{start_page} a {end_page}'}
         """)
     
     with col2:
@@ -161,105 +863,41 @@ with tab1:
                     "executive_terms": executive_terms,
                     "sector": sector_filter
                 }
-                
-                # Progress bar
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-                try:
-                    status_text.text("📡 Enviando requisição para N8N...")
-                    progress_bar.progress(25)
-                    
-                    # Chamada para o N8N
-                    response = requests.post(webhook_url, json=payload, timeout=300)
-                    progress_bar.progress(50)
-                    
-                    if response.status_code == 200:
-                        status_text.text("✅ Processando resultados...")
-                        progress_bar.progress(75)
-                        
-                        # Simular delay de processamento
-                        time.sleep(2)
-                        
-                        # Parse da resposta
-                        result_data = response.json()
-                        progress_bar.progress(100)
-                        
-                        # Ajustar para o formato do N8N Aggregate
-                        if 'leads' in result_data:
-                            leads = result_data['leads']
-                            # Se leads é um objeto com 'data', extrair o array
-                            if isinstance(leads, dict) and 'data' in leads:
-                                leads = leads['data']
-                            # Se leads não é uma lista, transformar em lista
-                            elif not isinstance(leads, list):
-                                leads = [leads]
-                        else:
-                            leads = []
-                        
-                        # Calcular estatísticas de potencial
-                        alto_potencial = len([l for l in leads if 'ALTO' in l.get('analise', '')])
-                        medio_potencial = len([l for l in leads if 'MÉDIO' in l.get('analise', '')])
-                        baixo_potencial = len(leads) - alto_potencial - medio_potencial
-                        
-                        # Taxa de conversão (alto potencial / total)
-                        conversion_rate = (alto_potencial / len(leads) * 100) if leads else 0
-                        
-                        # Salvar no session state
-                        st.session_state.leads_data = leads
-                        
-                        # Adicionar ao histórico com estatísticas detalhadas
-                        st.session_state.search_history.append({
-                            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            'query': query_preview,
-                            'results_count': len(leads),
-                            'location': location,
-                            'sector': sector_filter,
-                            'executive_terms': ', '.join(executive_terms),
-                            'alto_potencial': alto_potencial,
-                            'medio_potencial': medio_potencial,
-                            'baixo_potencial': baixo_potencial,
-                            'conversion_rate': round(conversion_rate, 1),
-                            'search_params': {
-                                'executive_terms': ', '.join(executive_terms),
-                                'sector': sector_filter,
-                                'location': location,
-                                'num_results': num_results,
-                                'start_page': start_page
-                            }
-                        })
-                        
-                        status_text.markdown(f'<div class="success-msg">✅ Busca concluída! Encontrados {len(leads)} leads.</div>', unsafe_allow_html=True)
-                        progress_bar.empty()
-                        
-                    else:
-                        st.error(f"❌ Erro na requisição: {response.status_code}")
-                        
-                except requests.exceptions.RequestException as e:
-                    st.error(f"❌ Erro de conexão: {str(e)}")
+                job = enfileirar_busca(payload, end_page, max_concurrency)
+                if not job.finished:
+                    st.success(f"✅ Busca adicionada à fila (job {job.id}). Você pode continuar navegando enquanto ela roda.")
+                elif job.status == 'done':
+                    st.markdown(f'<div class="success-msg">✅ Busca concluída! Encontrados {len(job.leads)} leads.</div>', unsafe_allow_html=True)
+                else:
+                    for error in job.errors:
+                        st.error(f"❌ {error}")
+    
+    # Fila de buscas (atualizada automaticamente enquanto houver jobs ativos)
+    jobs_ativos = any(not job.finished for job in jobs_da_sessao())
+    st.fragment(painel_jobs, run_every=JOB_POLL_SECONDS if jobs_ativos else None)()
 
 # TAB 2: Resultados
-with tab2:
+with tab2, medir_renderizacao("resultados"):
     st.header("📊 Resultados da Busca")
     
-    if st.session_state.leads_data:
+    leads_table = st.session_state.leads_table
+    
+    if leads_table is not None:
         # Métricas resumo
         col1, col2, col3, col4 = st.columns(4)
         
-        # Calcular estatísticas
-        total_leads = len(st.session_state.leads_data)
-        alto_potencial = len([l for l in st.session_state.leads_data if 'ALTO' in l.get('analise', '')])
-        medio_potencial = len([l for l in st.session_state.leads_data if 'MÉDIO' in l.get('analise', '')])
-        baixo_potencial = total_leads - alto_potencial - medio_potencial
+        # Estatísticas pré-calculadas na ingestão
+        total_leads = len(leads_table)
+        counts = st.session_state.potencial_counts
         
         with col1:
             st.metric("Total de Leads", total_leads, "🎯")
         with col2:
-            st.metric("Alto Potencial", alto_potencial, "🔥")
+            st.metric("Alto Potencial", counts['ALTO'], "🔥")
         with col3:
-            st.metric("Médio Potencial", medio_potencial, "⚡")
+            st.metric("Médio Potencial", counts['MÉDIO'], "⚡")
         with col4:
-            st.metric("Baixo Potencial", baixo_potencial, "📊")
+            st.metric("Baixo Potencial", counts['BAIXO'], "📊")
         
         # Filtros
         st.subheader("🔍 Filtrar Resultados")
@@ -272,52 +910,88 @@ with tab2:
             )
         
         with col2:
-            search_filter = st.text_input("🔍 Buscar por nome/empresa")
+            search_filter = st.text_input(
+                "🔍 Buscar por nome/empresa",
+                help="Busca no título, resumo e análise. Ignora acentos e aceita o início das palavras (ex: 'dir sao')"
+            )
         
-        # Aplicar filtros
-        filtered_data = st.session_state.leads_data.copy()
+        # Aplicar filtros (uma máscara vetorizada sobre a tabela); o resultado é uma lista de posições,
+        # não uma cópia da tabela: só a página visível (e a exportação, no clique) lê as linhas
+        import pandas as pd  # já carregado ao montar a tabela de leads
+        mask = pd.Series(True, index=leads_table.index)
         
         if potencial_filter != "Todos":
-            if potencial_filter == "Alto Potencial":
-                filtered_data = [l for l in filtered_data if 'ALTO' in l.get('analise', '')]
-            elif potencial_filter == "Médio Potencial":
-                filtered_data = [l for l in filtered_data if 'MÉDIO' in l.get('analise', '')]
-            elif potencial_filter == "Baixo Potencial":
-                filtered_data = [l for l in filtered_data if 'ALTO' not in l.get('analise', '') and 'MÉDIO' not in l.get('analise', '')]
+            mask &= leads_table['potencial'] == POTENCIAL_FILTERS[potencial_filter]
+        
+        matches = st.session_state.leads_index.search(search_filter) if search_filter else None
+        if matches is not None:
+            mask &= leads_table.index.isin(list(matches))
+        
+        # Perfis novos da última atualização de busca salva (só enquanto a tabela for a dessa atualização)
+        novos_digest, novos_posicoes = st.session_state.get('novos_leads', (None, []))
+        only_new = False
+        if novos_posicoes and novos_digest == st.session_state.leads_digest.hexdigest():
+            only_new = st.checkbox(f"🆕 Só os {len(novos_posicoes)} perfis novos desde a atualização anterior")
+            if only_new:
+                mask &= leads_table.index.isin(novos_posicoes)
         
-        if search_filter:
-            filtered_data = [l for l in filtered_data if search_filter.lower() in l.get('titulo', '').lower()]
+        posicoes = mask.to_numpy().nonzero()[0]
         
         # Exibir resultados
-        st.subheader(f"📋 Leads Encontrados ({len(filtered_data)})")
+        st.subheader(f"📋 Leads Encontrados ({len(posicoes)})")
+        if st.session_state.leads_origem == 'disco':
+            st.caption("💾 Os leads desta sessão passaram do orçamento de memória e estão em disco; cada página é lida sob demanda.")
         
-        for i, lead in enumerate(filtered_data):
-            with st.expander(f"👤 {lead.get('titulo', 'N/A')}", expanded=False):
+        # Paginação: só a página visível é renderizada e enviada ao navegador
+        col1, col2, col3, col4 = st.columns([1, 2, 1, 1])
+        with col4:
+            page_size = st.selectbox("Leads por página", RESULTS_PAGE_SIZES, index=1)
+        total_pages = max(1, math.ceil(len(posicoes) / page_size))
+        
+        # Voltar para a primeira página quando os filtros ou os dados mudarem
+        results_view = (potencial_filter, search_filter, only_new, page_size, st.session_state.leads_digest.hexdigest())
+        if st.session_state.get('results_view') != results_view:
+            st.session_state.results_view = results_view
+            st.session_state.results_page = 0
+        st.session_state.results_page = min(st.session_state.results_page, total_pages - 1)
+        current_page = st.session_state.results_page
+        
+        with col1:
+            st.button("⬅️ Anterior", on_click=mudar_pagina_resultados, args=(-1,),
+                      disabled=current_page == 0, use_container_width=True)
+        with col2:
+            first = current_page * page_size
+            last = min(first + page_size, len(posicoes))
+            st.markdown(f"<div style='text-align: center; padding-top: 0.5rem;'>Página {current_page + 1} de {total_pages} · "
+                        f"leads {first + 1 if last else 0}–{last}</div>", unsafe_allow_html=True)
+        with col3:
+            st.button("Próxima ➡️", on_click=mudar_pagina_resultados, args=(1,),
+                      disabled=current_page >= total_pages - 1, use_container_width=True)
+        
+        for lead in leads_nas_posicoes(leads_table, posicoes[first:last]):
+            with st.expander(f"👤 {lead['titulo'] or 'N/A'}", expanded=False):
                 col1, col2 = st.columns([3, 1])
                 
                 with col1:
-                    st.write(f"**🔗 Link:** {lead.get('link', 'N/A')}")
-                    st.write(f"**📝 Resumo:** {lead.get('resumo', 'N/A')}")
-                    st.write(f"**🤖 Análise IA:** {lead.get('analise', 'N/A')}")
+                    st.write(f"**🔗 Link:** {lead['link'] or 'N/A'}")
+                    st.write(f"**📝 Resumo:** {lead['resumo'] or 'N/A'}")
+                    st.write(f"**🤖 Análise IA:** {lead['analise'] or 'N/A'}")
                 
                 with col2:
-                    # Determinar cor do potencial
-                    potencial_color = "🔥" if "ALTO" in lead.get('analise', '') else "⚡" if "MÉDIO" in lead.get('analise', '') else "📊"
-                    st.markdown(f"### {potencial_color} Potencial")
+                    # Cor do potencial
+                    st.markdown(f"### {POTENCIAL_ICONS[lead['potencial']]} Potencial")
         
         # Botões de ação
         col1, col2 = st.columns(2)
         
         with col1:
-            if st.button("📥 Exportar para CSV"):
-                df = pd.DataFrame(filtered_data)
-                csv = df.to_csv(index=False)
-                st.download_button(
-                    label="⬇️ Download CSV",
-                    data=csv,
-                    file_name=f"leads_linkedin_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv"
-                )
+            export_format = st.selectbox("📥 Formato de exportação", formatos_exportacao(), key="leads_export_format")
+            spill = st.session_state.leads_data.spill if st.session_state.leads_origem == 'disco' else None
+            botao_exportacao(
+                lambda: leads_table.iloc[posicoes] if spill is None else montar_tabela_leads(spill.read_leads(posicoes)),
+                f"{st.session_state.leads_digest.hexdigest()}|{potencial_filter}|{search_filter}|{only_new}",
+                export_format, "leads_linkedin", f"⬇️ Exportar {export_format}"
+            )
         
         with col2:
             # Botão para abrir planilha do Google Sheets
@@ -327,15 +1001,16 @@ with tab2:
         st.info("🔍 Nenhum resultado encontrado. Execute uma busca primeiro!")
 
 # TAB 3: Analytics
-with tab3:
+with tab3, medir_renderizacao("analytics"):
     st.header("📈 Analytics e Insights")
     
-    if st.session_state.leads_data:
-        # Estatísticas simples
+    if st.session_state.leads_table is not None:
+        # Estatísticas simples (pré-calculadas na ingestão)
+        counts = st.session_state.potencial_counts
         potencial_counts = {
-            'Alto': len([l for l in st.session_state.leads_data if 'ALTO' in l.get('analise', '')]),
-            'Médio': len([l for l in st.session_state.leads_data if 'MÉDIO' in l.get('analise', '')]),
-            'Baixo': len(st.session_state.leads_data) - len([l for l in st.session_state.leads_data if 'ALTO' in l.get('analise', '') or 'MÉDIO' in l.get('analise', '')])
+            'Alto': counts['ALTO'],
+            'Médio': counts['MÉDIO'],
+            'Baixo': counts['BAIXO']
         }
         
         # Mostrar estatísticas
@@ -352,7 +1027,7 @@ with tab3:
         # Insights automáticos
         st.subheader("🧠 Insights Automáticos")
         
-        total = len(st.session_state.leads_data)
+        total = len(st.session_state.leads_table)
         alto_perc = (potencial_counts['Alto'] / total * 100) if total > 0 else 0
         
         if alto_perc > 30:
@@ -366,15 +1041,19 @@ with tab3:
         st.info("📊 Execute uma busca para ver analytics!")
 
 # TAB 4: Histórico
-with tab4:
+with tab4, medir_renderizacao("historico"):
     st.header("📋 Histórico de Buscas")
     
-    if st.session_state.search_history:
-        # Estatísticas do histórico
-        total_searches = len(st.session_state.search_history)
-        total_leads_found = sum([s['results_count'] for s in st.session_state.search_history])
+    with st.expander("⭐ Buscas Salvas", expanded=bool(get_saved_searches().list())):
+        painel_buscas_salvas()
+    
+    history = st.session_state.search_history
+    if history:
+        # Estatísticas do histórico (mantidas a cada busca, sem ler as entradas antigas do disco)
+        total_searches = len(history)
+        total_leads_found = history.total_leads
         avg_leads = total_leads_found / total_searches if total_searches > 0 else 0
-        avg_conversion = sum([s.get('conversion_rate', 0) for s in st.session_state.search_history]) / total_searches if total_searches > 0 else 0
+        avg_conversion = history.avg_conversion
         
         # Métricas do histórico
         col1, col2, col3, col4 = st.columns(4)
@@ -390,8 +1069,9 @@ with tab4:
         # Histórico detalhado
         st.subheader("📊 Histórico Detalhado")
         
-        for i, search in enumerate(reversed(st.session_state.search_history)):
-            with st.expander(f"🔍 Busca {len(st.session_state.search_history) - i} - {search['timestamp']}", expanded=False):
+        # Só as buscas mais recentes; as mais antigas são lidas do disco quando pedidas
+        for i, search in history.newest(0, st.session_state.history_visible):
+            with st.expander(f"🔍 Busca {i + 1} - {search['timestamp']}", expanded=False):
                 col1, col2 = st.columns([2, 1])
                 
                 with col1:
@@ -415,52 +1095,40 @@ with tab4:
                     st.write("**Ações:**")
                     
                     # Botão para repetir busca
-                    if st.button(f"🔄 Repetir Busca", key=f"repeat_{i}"):
-                        # Extrair parâmetros da busca
+                    if st.button(f"🔄 Repetir Busca", key=f"repeat_{i}",
+                                 help="Salva a busca e a atualiza: só os perfis que ela ainda não tinha visto são analisados"):
+                        # Extrair parâmetros da busca e atualizar a busca salva correspondente
                         search_params = search.get('search_params', {})
-                        
-                        # Simular repetição da busca
                         st.info("🔄 Repetindo busca com os mesmos parâmetros...")
-                        st.write("**Parâmetros da busca:**")
-                        for key, value in search_params.items():
-                            st.write(f"- {key}: {value}")
-                        
-                        # Você pode implementar aqui a lógica real para repetir a busca
-                        # Por exemplo, definindo os valores no session_state e redirecionando
-                        st.warning("💡 **Dica:** Copie os parâmetros acima e cole na aba 'Buscar Leads'")
+                        repeat_payload = payload_do_historico(search_params)
+                        repeat_end_page = search_params.get('end_page', repeat_payload['start_page'])
+                        salvar_e_atualizar(repeat_payload, repeat_end_page)
+                        st.rerun()
                     
                     # Botão para ver detalhes
                     if st.button(f"👁️ Ver Query", key=f"query_{i}"):
                         st.code(search.get('query', 'Query não disponível'))
         
+        if len(history) > st.session_state.history_visible:
+            if st.button(f"⬇️ Mostrar buscas anteriores ({len(history) - st.session_state.history_visible} restantes)"):
+                st.session_state.history_visible += HISTORY_PAGE_SIZE
+                st.rerun()
+        if len(history) > history.in_memory:
+            st.caption(f"{history.in_memory} buscas mais recentes em memória · {len(history) - history.in_memory} em disco")
+        
         # Análise de tendências
         st.subheader("📈 Análise de Tendências")
         
-        if len(st.session_state.search_history) > 1:
-            # Preparar dados para análise
-            df_history = pd.DataFrame(st.session_state.search_history)
-            
+        if len(history) > 1:
             # Média de leads por localização
-            if 'location' in df_history.columns:
-                location_stats = df_history.groupby('location').agg({
-                    'results_count': 'mean',
-                    'conversion_rate': 'mean'
-                }).round(1)
-                
-                st.write("**📍 Performance por Localização:**")
-                for location, stats in location_stats.iterrows():
-                    st.write(f"- {location}: {stats['results_count']} leads/busca ({stats['conversion_rate']}% conversão)")
+            st.write("**📍 Performance por Localização:**")
+            for location, leads_per_search, conversion in history.trends('location'):
+                st.write(f"- {location}: {leads_per_search} leads/busca ({conversion}% conversão)")
             
             # Média de leads por setor
-            if 'sector' in df_history.columns:
-                sector_stats = df_history.groupby('sector').agg({
-                    'results_count': 'mean',
-                    'conversion_rate': 'mean'
-                }).round(1)
-                
-                st.write("**🏭 Performance por Setor:**")
-                for sector, stats in sector_stats.iterrows():
-                    st.write(f"- {sector}: {stats['results_count']} leads/busca ({stats['conversion_rate']}% conversão)")
+            st.write("**🏭 Performance por Setor:**")
+            for sector, leads_per_search, conversion in history.trends('sector'):
+                st.write(f"- {sector}: {leads_per_search} leads/busca ({conversion}% conversão)")
         
         # Botão para limpar histórico
         st.subheader("🗑️ Gerenciar Histórico")
@@ -468,24 +1136,89 @@ with tab4:
         
         with col1:
             if st.button("🗑️ Limpar Histórico"):
-                st.session_state.search_history = []
+                history.clear()
+                st.session_state.history_visible = HISTORY_PAGE_SIZE
                 st.success("✅ Histórico limpo!")
                 st.rerun()
         
         with col2:
             # Botão para exportar histórico
-            if st.button("📥 Exportar Histórico"):
-                df_export = pd.DataFrame(st.session_state.search_history)
-                csv_export = df_export.to_csv(index=False)
-                st.download_button(
-                    label="⬇️ Download Histórico CSV",
-                    data=csv_export,
-                    file_name=f"historico_buscas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv"
-                )
+            history_format = st.selectbox("📥 Formato de exportação", formatos_exportacao(), key="history_export_format")
+            history_rows = history.snapshot()
+            botao_exportacao(
+                lambda: tabela_de_registros(history_rows()), history.digest(),
+                history_format, "historico_buscas", f"⬇️ Exportar Histórico {history_format}"
+            )
     
     else:
         st.info("📝 Nenhuma busca realizada ainda.")
+    
+    # Analytics de todas as sessões (persistente)
+    st.subheader("🗄️ Analytics de Todas as Buscas")
+    painel_analytics()
+
+# TAB 5: Campanhas
+with tab5, medir_renderizacao("campanhas"):
+    st.header("🗂️ Campanhas em Lote")
+    
+    with st.expander("➕ Nova Campanha", expanded=not get_campaign_runner().campaigns):
+        campaign_mode = st.radio("Origem das buscas", ["Grade de combinações", "Arquivo CSV"], horizontal=True)
+        
+        campaign_items = []
+        if campaign_mode == "Grade de combinações":
+            terms_text = st.text_area(
+                "🎯 Cargos (um conjunto por linha)", value=executive_input,
+                help="Cada linha vira uma busca, ex: 'CEO CMO' em uma linha e 'diretor comercial' em outra"
+            )
+            col1, col2 = st.columns(2)
+            with col1:
+                grid_sectors = st.multiselect("🏭 Setores", sector_options, default=[sector_filter])
+            with col2:
+                grid_locations = st.multiselect("📍 Localizações", location_options, default=[location])
+            col1, col2 = st.columns(2)
+            with col1:
+                grid_start = st.number_input("Página Inicial", 0, 50, 0, key="campaign_start_page")
+            with col2:
+                grid_end = st.number_input("Página Final", grid_start, 50, grid_start, key="campaign_end_page")
+            campaign_items = itens_da_grade(terms_text, grid_sectors, grid_locations, grid_start, grid_end)
+        else:
+            uploaded = st.file_uploader(
+                "📄 CSV com as colunas executive_terms, sector, location, start_page, end_page", type="csv"
+            )
+            if uploaded is not None:
+                try:
+                    campaign_items = itens_do_csv(uploaded)
+                except ValueError as e:
+                    st.error(f"❌ {str(e)}")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            campaign_rate = st.number_input(
+                "Requisições por minuto", 1, int(CAMPAIGN_MAX_RATE_PER_MINUTE), CAMPAIGN_RATE_PER_MINUTE,
+                help="O limite do webhook (LEADGEN_CAMPAIGN_MAX_RATE) é dividido entre as campanhas em andamento"
+            )
+        with col2:
+            campaign_concurrency = st.slider("Buscas simultâneas", 1, CAMPAIGN_MAX_CONCURRENCY, CAMPAIGN_CONCURRENCY)
+        
+        total_requests = sum(item['end_page'] - item['start_page'] + 1 for item in campaign_items)
+        st.caption(f"{len(campaign_items)} buscas · {total_requests} requisições · "
+                   f"~{total_requests / campaign_rate:.0f} min no limite de taxa (menos se houver cache)")
+        
+        if st.button("▶️ Iniciar Campanha", type="primary", disabled=not campaign_items):
+            campaign = get_campaign_runner().create(
+                campaign_items, num_results, campaign_rate, campaign_concurrency,
+                send_known=st.session_state.get('send_known_profiles', True)
+            )
+            st.session_state.campaigns.append(campaign.id)
+            st.success(f"✅ Campanha {campaign.id} iniciada com {len(campaign_items)} buscas!")
+    
+    st.subheader("📋 Campanhas")
+    campanhas_ativas = any(c.status == 'running' for c in get_campaign_runner().campaigns.values())
+    st.fragment(painel_campanhas, run_every=CAMPAIGN_POLL_SECONDS if campanhas_ativas else None)()
+
+# Diagnósticos (oculto; depois das abas para incluir o tempo de renderização deste rerun)
+if get_metrics().enabled or st.query_params.get("diag") == "1":
+    painel_diagnosticos()
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,15 @@
+"""Núcleo do gerador de leads do LinkedIn: usado pelo dashboard Streamlit e pela CLI `lead-gen`.
+
+Os módulos com dependências pesadas (pandas, requests, pyarrow, openpyxl) só são carregados
+quando importados diretamente, para manter a CLI e a inicialização do dashboard leves.
+"""
+
+from .core import (
+    POTENCIAIS, classificar_potencial, extrair_leads, hash_perfil, mesclar_leads, montar_payload,
+    montar_query, normalizar_link,
+)
+
+__all__ = [
+    'POTENCIAIS', 'classificar_potencial', 'extrair_leads', 'hash_perfil', 'mesclar_leads',
+    'montar_payload', 'montar_query', 'normalizar_link',
+]
@@ -0,0 +1,147 @@
+"""Histórico persistente de buscas com agregados mantidos a cada inserção (analytics de todas as sessões)."""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from .config import ANALYTICS_TOP_CELLS, ANALYTICS_TREND_DAYS
+
+ANALYTICS_DIMENSIONS = ('location', 'sector', 'term', 'term_location')
+_CELL_SEPARATOR = "\t"
+
+
+def _taxa(row):
+    """Campos derivados de uma linha de agregado (buscas, leads, alto, médio, baixo, soma das conversões)"""
+    searches, leads, alto, medio, baixo, conversion_sum = row
+    return {
+        'searches': searches,
+        'leads': leads,
+        'alto_potencial': alto,
+        'medio_potencial': medio,
+        'baixo_potencial': baixo,
+        'leads_per_search': round(leads / searches, 1) if searches else 0,
+        'conversion_rate': round(conversion_sum / searches, 1) if searches else 0,
+    }
+
+
+class AnalyticsStore:
+    """Buscas concluídas (SQLite) e seus agregados por local, setor, cargo e cargo × local.
+
+    Cada busca atualiza os agregados do período todo, do dia e do mês, então as consultas da aba
+    de histórico leem só os agregados: o custo não cresce com o número de buscas registradas.
+    """
+
+    def __init__(self, db_path):
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS searches ("
+            " id INTEGER PRIMARY KEY, ts REAL, location TEXT, sector TEXT, executive_terms TEXT,"
+            " num_results INTEGER, start_page INTEGER, end_page INTEGER, results_count INTEGER,"
+            " alto INTEGER, medio INTEGER, baixo INTEGER, conversion_rate REAL);"
+            "CREATE TABLE IF NOT EXISTS rollups ("
+            " dimension TEXT, value TEXT, granularity TEXT, bucket TEXT,"
+            " searches INTEGER, leads INTEGER, alto INTEGER, medio INTEGER, baixo INTEGER, conversion_sum REAL,"
+            " PRIMARY KEY (dimension, value, granularity, bucket));"
+            "CREATE INDEX IF NOT EXISTS rollups_window ON rollups (dimension, granularity, bucket);"
+        )
+        self._conn.commit()
+
+    def record(self, payload, results_count, counts, timestamp=None):
+        """Registra uma busca concluída e soma seus números nos agregados"""
+        timestamp = time.time() if timestamp is None else timestamp
+        moment = datetime.fromtimestamp(timestamp)
+        conversion_rate = round(counts['ALTO'] / results_count * 100, 1) if results_count else 0
+        terms = [t.strip() for t in payload['executive_terms'] if t.strip()]
+        location, sector = payload['location'], payload['sector']
+
+        cells = [('total', ''), ('location', location), ('sector', sector)]
+        for term in dict.fromkeys(terms):
+            cells.append(('term', term))
+            cells.append(('term_location', f"{term}{_CELL_SEPARATOR}{location}"))
+        buckets = [('all', ''), ('day', moment.strftime("%Y-%m-%d")), ('month', moment.strftime("%Y-%m"))]
+        numbers = (results_count, counts['ALTO'], counts['MÉDIO'], counts['BAIXO'], conversion_rate)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO searches (ts, location, sector, executive_terms, num_results, start_page, end_page,"
+                " results_count, alto, medio, baixo, conversion_rate) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (timestamp, location, sector, ', '.join(terms), payload['num_results'], payload['start_page'],
+                 payload.get('end_page', payload['start_page']), *numbers)
+            )
+            self._conn.executemany(
+                "INSERT INTO rollups VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (dimension, value, granularity, bucket) DO UPDATE SET"
+                " searches = searches + 1, leads = leads + excluded.leads, alto = alto + excluded.alto,"
+                " medio = medio + excluded.medio, baixo = baixo + excluded.baixo,"
+                " conversion_sum = conversion_sum + excluded.conversion_sum",
+                [(dimension, value, granularity, bucket, *numbers)
+                 for dimension, value in cells for granularity, bucket in buckets]
+            )
+            self._conn.commit()
+
+    def _window(self, days):
+        """Filtro SQL dos agregados: período todo, ou os dias a partir de hoje - `days` + 1"""
+        if days is None:
+            return "granularity = 'all'", ()
+        first_day = (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        return "granularity = 'day' AND bucket >= ?", (first_day,)
+
+    def summary(self, days=None):
+        """Totais de buscas, leads e conversão média no período"""
+        where, params = self._window(days)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(SUM(searches), 0), COALESCE(SUM(leads), 0), COALESCE(SUM(alto), 0),"
+                " COALESCE(SUM(medio), 0), COALESCE(SUM(baixo), 0), COALESCE(SUM(conversion_sum), 0)"
+                f" FROM rollups WHERE dimension = 'total' AND {where}", params
+            ).fetchone()
+        return _taxa(row)
+
+    def breakdown(self, dimension, days=None, limit=None):
+        """Números por local, setor, cargo ou cargo × local no período, dos mais buscados para os menos"""
+        if dimension not in ANALYTICS_DIMENSIONS:
+            raise ValueError(f"dimensão desconhecida: {dimension}")
+        where, params = self._window(days)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value, SUM(searches), SUM(leads), SUM(alto), SUM(medio), SUM(baixo), SUM(conversion_sum)"
+                f" FROM rollups WHERE dimension = ? AND {where} GROUP BY value"
+                " ORDER BY SUM(searches) DESC, value LIMIT ?",
+                (dimension, *params, -1 if limit is None else limit)
+            ).fetchall()
+        return [{'value': row[0], **_taxa(row[1:])} for row in rows]
+
+    def top_cells(self, days=None, limit=ANALYTICS_TOP_CELLS, min_searches=1):
+        """Combinações cargo × local com maior conversão média no período"""
+        where, params = self._window(days)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value, SUM(searches), SUM(leads), SUM(alto), SUM(medio), SUM(baixo), SUM(conversion_sum)"
+                f" FROM rollups WHERE dimension = 'term_location' AND {where} GROUP BY value"
+                " HAVING SUM(searches) >= ? ORDER BY SUM(conversion_sum) / SUM(searches) DESC, SUM(leads) DESC LIMIT ?",
+                (*params, min_searches, limit)
+            ).fetchall()
+        cells = []
+        for row in rows:
+            term, location = row[0].split(_CELL_SEPARATOR, 1)
+            cells.append({'term': term, 'location': location, **_taxa(row[1:])})
+        return cells
+
+    def conversion_trend(self, granularity='day', limit=ANALYTICS_TREND_DAYS):
+        """Buscas, leads e conversão média por dia ou mês (os `limit` períodos mais recentes, do mais antigo ao mais novo)"""
+        if granularity not in ('day', 'month'):
+            raise ValueError(f"granularidade inválida: {granularity}")
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT bucket, searches, leads, alto, medio, baixo, conversion_sum FROM rollups"
+                " WHERE dimension = 'total' AND value = '' AND granularity = ? ORDER BY bucket DESC LIMIT ?",
+                (granularity, limit)
+            ).fetchall()
+        return [{'period': row[0], **_taxa(row[1:])} for row in reversed(rows)]
+
+    def __len__(self):
+        return self.summary()['searches']
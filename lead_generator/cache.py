@@ -0,0 +1,129 @@
+"""Cache das respostas do webhook (LRU em memória + SQLite em disco)."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .config import CACHE_MAX_DISK_BYTES, CACHE_MAX_MEMORY_ENTRIES, CACHE_TTL_SECONDS
+
+
+class ResponseCache:
+    """Cache das respostas do N8N: LRU em memória + SQLite em disco, ambos com TTL.
+
+    O TTL é do processo (vale para todas as sessões e para a CLI) e decide o que sai do disco;
+    quem quiser respostas mais recentes passa `max_age` em get(), sem afetar os demais.
+    """
+
+    def __init__(self, db_path, ttl_seconds=CACHE_TTL_SECONDS,
+                 max_memory_entries=CACHE_MAX_MEMORY_ENTRIES, max_disk_bytes=CACHE_MAX_DISK_BYTES):
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+        self._memory = OrderedDict()  # chave -> (criado_em, resposta)
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, created_at REAL, accessed_at REAL, size INTEGER, body TEXT)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(payload, url=None):
+        """Hash canônico do payload (ordem das chaves não importa) e do webhook que o respondeu."""
+        canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        if url:
+            canonical = f"{url}\n{canonical}"
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def _expired(self, created_at, now):
+        return now - created_at > self.ttl_seconds
+
+    def get(self, payload, max_age=None, url=None):
+        """Resposta em cache, ou None; com `max_age` (segundos), respostas mais antigas contam como falta"""
+        key = self.make_key(payload, url)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._expired(entry[0], now):
+                    del self._memory[key]
+                elif max_age is None or now - entry[0] <= max_age:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return entry[1]
+
+            row = self._conn.execute(
+                "SELECT created_at, body FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                created_at, body = row
+                if self._expired(created_at, now):
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                elif max_age is None or now - created_at <= max_age:
+                    self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                    self._conn.commit()
+                    value = json.loads(body)
+                    self._remember(key, created_at, value)
+                    self.stats['disk_hits'] += 1
+                    return value
+                # Mais antiga que o max_age de quem pediu, mas ainda válida para os demais
+
+            self.stats['misses'] += 1
+            return None
+
+    def set(self, payload, value, url=None):
+        key = self.make_key(payload, url)
+        now = time.time()
+        body = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, now, value)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, created_at, accessed_at, size, body) VALUES (?, ?, ?, ?, ?)",
+                (key, now, now, len(body), body)
+            )
+            self._evict_disk(now)
+            self._conn.commit()
+
+    def _remember(self, key, created_at, value):
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now):
+        # Remove expirados e depois os menos acessados até caber no limite de tamanho
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall():
+            if total <= self.max_disk_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._memory.pop(key, None)
+            total -= size
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            for k in self.stats:
+                self.stats[k] = 0
+
+    def disk_usage(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
@@ -0,0 +1,243 @@
+"""Campanhas de buscas em lote, com limite de taxa e checkpoint em disco."""
+
+import csv
+import io
+import itertools
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from .config import CAMPAIGN_MAX_CONCURRENCY, CAMPAIGN_MAX_RATE_PER_MINUTE
+from .search import BuscaCancelada
+
+
+class TokenBucket:
+    """Limite de taxa: `rate_per_minute` requisições por minuto, com rajadas de até `capacity`.
+
+    Com `parent`, cada requisição também consome um token dele (limite compartilhado com outros buckets).
+    """
+
+    def __init__(self, rate_per_minute, capacity=1, parent=None):
+        self.rate = rate_per_minute / 60
+        self.capacity = max(1, capacity)
+        self.parent = parent
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, stop_event=None):
+        """Bloqueia até haver um token (aqui e no `parent`); retorna False se `stop_event` for sinalizado antes"""
+        if not self._acquire(stop_event):
+            return False
+        return self.parent is None or self.parent.acquire(stop_event)
+
+    def _acquire(self, stop_event):
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                return False
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if stop_event is None:
+                time.sleep(wait)
+            elif stop_event.wait(wait):
+                return False
+
+
+class Campaign:
+    """Campanha de buscas em lote, com checkpoint em JSON a cada item concluído."""
+
+    def __init__(self, data, path):
+        self.data = data
+        self.path = path
+        self.item_results = {}  # índice do item -> (payload, leads), só desta execução do servidor
+        self.stop_event = threading.Event()
+        self.thread = None  # execução atual (ou a última), para a retomada esperar a anterior terminar
+        self._lock = threading.Lock()
+
+    @property
+    def id(self):
+        return self.data['id']
+
+    @property
+    def status(self):
+        return self.data['status']
+
+    @classmethod
+    def create(cls, directory, items, num_results, rate_per_minute, concurrency, send_known=True):
+        campaign_id = uuid.uuid4().hex[:8]
+        data = {
+            'id': campaign_id,
+            'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'status': 'running',
+            'num_results': num_results,
+            'rate_per_minute': rate_per_minute,
+            'concurrency': concurrency,
+            'send_known': send_known,
+            'items': [{**item, 'status': 'pending'} for item in items],
+        }
+        return cls(data, os.path.join(directory, f"{campaign_id}.json"))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f), path)
+
+    def save(self):
+        # Escrita atômica: um processo derrubado no meio não corrompe o checkpoint
+        with self._lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def update_item(self, index, **fields):
+        with self._lock:
+            self.data['items'][index].update(fields)
+        self.save()
+
+    def progress(self):
+        counts = {'pending': 0, 'running': 0, 'done': 0, 'failed': 0}
+        for item in self.data['items']:
+            counts[item['status']] += 1
+        return counts
+
+
+class CampaignRunner:
+    """Executa as campanhas em segundo plano e retoma as que estavam em andamento ao reiniciar.
+
+    A taxa e as buscas simultâneas de todas as campanhas juntas ficam dentro de `max_rate_per_minute`
+    e `max_concurrency`; os limites de cada campanha só reduzem a parte dela.
+    """
+
+    def __init__(self, directory, worker, max_rate_per_minute=CAMPAIGN_MAX_RATE_PER_MINUTE,
+                 max_concurrency=CAMPAIGN_MAX_CONCURRENCY):
+        self.directory = directory
+        self.worker = worker  # worker(item, num_results, bucket, stop_event, send_known) -> (payload, leads)
+        self.campaigns = {}
+        self.bucket = TokenBucket(max_rate_per_minute, max_concurrency)
+        self._slots = threading.Semaphore(max_concurrency)
+        os.makedirs(directory, exist_ok=True)
+
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith('.json'):
+                continue
+            campaign = Campaign.load(os.path.join(directory, name))
+            self.campaigns[campaign.id] = campaign
+            if campaign.status == 'running':
+                self._start(campaign)
+
+    def create(self, items, num_results, rate_per_minute, concurrency, send_known=True):
+        campaign = Campaign.create(self.directory, items, num_results, rate_per_minute, concurrency, send_known)
+        campaign.save()
+        self.campaigns[campaign.id] = campaign
+        self._start(campaign)
+        return campaign
+
+    def stop(self, campaign_id):
+        campaign = self.campaigns[campaign_id]
+        campaign.stop_event.set()
+        campaign.data['status'] = 'stopped'
+        campaign.save()
+
+    def resume(self, campaign_id):
+        campaign = self.campaigns[campaign_id]
+        campaign.data['status'] = 'running'
+        campaign.save()
+        self._start(campaign)
+
+    def _start(self, campaign):
+        previous = campaign.thread
+        campaign.stop_event = threading.Event()
+        campaign.thread = threading.Thread(target=self._run, args=(campaign, campaign.stop_event, previous),
+                                           daemon=True, name=f"campanha-{campaign.id}")
+        campaign.thread.start()
+
+    def _run(self, campaign, stop_event, previous=None):
+        # Retomada logo depois de parar: o item que ainda estava em andamento termina na execução anterior
+        if previous is not None:
+            previous.join()
+        # Itens interrompidos no meio (processo derrubado) voltam para a fila
+        for index, item in enumerate(campaign.data['items']):
+            if item['status'] == 'running':
+                campaign.update_item(index, status='pending')
+        bucket = TokenBucket(campaign.data['rate_per_minute'], campaign.data['concurrency'], parent=self.bucket)
+        pending = [i for i, item in enumerate(campaign.data['items']) if item['status'] == 'pending']
+        with ThreadPoolExecutor(max_workers=campaign.data['concurrency']) as executor:
+            for index in pending:
+                executor.submit(self._run_item, campaign, index, bucket, stop_event)
+        if not stop_event.is_set():
+            campaign.data['status'] = 'done'
+            campaign.save()
+
+    def _run_item(self, campaign, index, bucket, stop_event):
+        # Vaga entre as buscas simultâneas de todas as campanhas
+        while not self._slots.acquire(timeout=0.5):
+            if stop_event.is_set():
+                return
+        try:
+            if not stop_event.is_set():
+                self._run_slot(campaign, index, bucket, stop_event)
+        finally:
+            self._slots.release()
+
+    def _run_slot(self, campaign, index, bucket, stop_event):
+        item = campaign.data['items'][index]
+        campaign.update_item(index, status='running')
+        try:
+            # Checkpoints anteriores à opção sempre enviavam os perfis conhecidos
+            payload, leads = self.worker(item, campaign.data['num_results'], bucket, stop_event,
+                                         campaign.data.get('send_known', True))
+        except BuscaCancelada:
+            campaign.update_item(index, status='pending')
+            return
+        except Exception as e:
+            campaign.update_item(index, status='failed', error=str(e),
+                                 finished_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            return
+        campaign.item_results[index] = (payload, leads)
+        campaign.update_item(index, status='done', results_count=len(leads),
+                             finished_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+
+def itens_da_grade(terms_text, sectors, locations, start, end):
+    """Combinações cargos × setores × localizações de uma grade de campanha"""
+    term_sets = [[t for t in re.split(r'[,\s]+', line) if t] for line in terms_text.splitlines()]
+    return [
+        {'executive_terms': terms, 'sector': sector, 'location': loc, 'start_page': start, 'end_page': end}
+        for terms, sector, loc in itertools.product([t for t in term_sets if t], sectors, locations)
+    ]
+
+
+def itens_do_csv(uploaded_file):
+    """Itens de campanha a partir de um CSV (executive_terms, sector, location, start_page, end_page)"""
+    content = uploaded_file.read()
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+    reader = csv.DictReader(io.StringIO(content))
+    if 'executive_terms' not in (reader.fieldnames or []):
+        raise ValueError("O CSV precisa da coluna 'executive_terms'")
+    items = []
+    for row in reader:
+        terms = [t for t in re.split(r'[,\s]+', row['executive_terms'] or '') if t]
+        if not terms:
+            continue
+        start = int(row.get('start_page') or 0)
+        items.append({
+            'executive_terms': terms,
+            'sector': row.get('sector') or 'Todos os setores',
+            'location': row.get('location') or 'Brasil',
+            'start_page': start,
+            'end_page': max(start, int(row.get('end_page') or start)),
+        })
+    return items
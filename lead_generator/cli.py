@@ -0,0 +1,174 @@
+"""CLI headless do gerador de leads (sem Streamlit e sem pandas).
+
+    lead-gen search --terms CEO CMO --sector "Tecnologia/SaaS" --location "São Paulo" --pages 0-4
+    lead-gen search --terms CEO --location Brasil --format csv --output leads.csv
+    lead-gen refresh --output novos.ndjson      (buscas salvas agendadas que venceram, ex.: via cron)
+
+Usa o mesmo cache de respostas, base de leads e métricas do dashboard (LEADGEN_CACHE_DIR),
+então buscas já feitas em qualquer um dos dois não voltam ao N8N.
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+
+from .config import (
+    ANALYTICS_PATH, CACHE_DIR, LEAD_STORE_PATH, MAX_CONCURRENT_PAGES, METRICS_DIR, SAVED_SEARCH_PATH, WEBHOOK_URL,
+)
+from .core import LOCALIZACOES, SETORES, classificar_potencial, contar_potencial_leads, montar_payload
+
+OUTPUT_FORMATS = ('ndjson', 'csv')
+CSV_COLUMNS = ['titulo', 'link', 'resumo', 'analise', 'potencial']
+
+
+def intervalo_de_paginas(text):
+    """'3' -> (3, 3); '0-4' -> (0, 4)"""
+    match = re.fullmatch(r'\s*(\d+)\s*(?:-\s*(\d+))?\s*', text)
+    if not match:
+        raise argparse.ArgumentTypeError(f"intervalo de páginas inválido: {text!r} (use N ou N-M)")
+    start = int(match.group(1))
+    end = int(match.group(2)) if match.group(2) is not None else start
+    if end < start:
+        raise argparse.ArgumentTypeError(f"intervalo de páginas invertido: {text!r}")
+    return start, end
+
+
+def escrever_leads(leads, out, format_name):
+    if format_name == 'csv':
+        writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        for lead in leads:
+            writer.writerow({col: lead.get(col) or '' for col in CSV_COLUMNS})
+    else:
+        for lead in leads:
+            out.write(json.dumps(lead, ensure_ascii=False) + "\n")
+
+
+def criar_servico(webhook_url, use_cache=True, saved=None):
+    from .analytics import AnalyticsStore
+    from .cache import ResponseCache
+    from .client import WebhookClient
+    from .metrics import Metrics
+    from .search import SearchService
+    from .store import LeadStore
+
+    cache = ResponseCache(os.path.join(CACHE_DIR, "responses.sqlite3")) if use_cache else None
+    return SearchService(webhook_url, WebhookClient(), cache, LeadStore(LEAD_STORE_PATH), Metrics(METRICS_DIR),
+                         saved=saved, analytics=AnalyticsStore(ANALYTICS_PATH))
+
+
+def gravar_saida(leads, args):
+    leads = [{**lead, 'potencial': classificar_potencial(lead.get('analise'))} for lead in leads]
+    if args.output and args.output != '-':
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            escrever_leads(leads, f, args.format)
+    else:
+        escrever_leads(leads, sys.stdout, args.format)
+
+
+def comando_search(args):
+    from .jobs import SearchJob
+
+    start_page, end_page = args.pages
+    payload = montar_payload(args.terms, args.sector, args.location, args.num_results, start_page)
+    service = criar_servico(args.webhook_url, use_cache=not args.no_cache)
+
+    job = SearchJob(payload, end_page, args.max_concurrency, send_known=not args.no_known_profiles)
+    job.trace = service.metrics.start_trace(f"CLI · {', '.join(args.terms)} · {args.location}")
+    service.run_job(job)
+    service.metrics.finish_trace(job.trace, status=job.status, leads=len(job.leads), pages=job.pages_total)
+
+    for error in job.errors:
+        print(f"erro: {error}", file=sys.stderr)
+
+    gravar_saida(job.leads, args)
+
+    counts = contar_potencial_leads(job.leads)
+    resumo = " · ".join(f"{potencial}: {n}" for potencial, n in counts.items())
+    print(f"{len(job.leads)} leads em {job.pages_total} página(s) ({resumo})", file=sys.stderr)
+    return 1 if job.status == 'failed' else 0
+
+
+def comando_refresh(args):
+    from .saved import SavedSearchStore, executar_atualizacao
+
+    saved_store = SavedSearchStore(SAVED_SEARCH_PATH)
+    if args.list:
+        for saved in saved_store.list():
+            payload = saved['payload']
+            agenda = f"diária às {saved['schedule_hour']:02d}:00" if saved['schedule_hour'] is not None else "manual"
+            print(f"{saved['id']}\t{', '.join(payload['executive_terms'])}\t{payload['location']}\t"
+                  f"págs. {payload['start_page']}-{saved['end_page']}\t{agenda}")
+        return 0
+
+    if args.ids:
+        searches = [saved_store.get(saved_id) for saved_id in args.ids]
+        missing = [saved_id for saved_id, saved in zip(args.ids, searches) if saved is None]
+        if missing:
+            print(f"erro: busca salva não encontrada: {', '.join(missing)}", file=sys.stderr)
+            return 1
+    else:
+        searches = saved_store.list() if args.all else saved_store.claim_due()
+
+    service = criar_servico(args.webhook_url, saved=saved_store)
+    new_leads = []
+    failed = False
+    for saved in searches:
+        job = executar_atualizacao(service, saved, args.max_concurrency, "CLI")
+        for error in job.errors:
+            print(f"erro ({saved['id']}): {error}", file=sys.stderr)
+        failed = failed or job.status == 'failed'
+        new_leads.extend(job.new_leads or [])
+        print(f"{saved['id']}: {len(job.leads)} leads, {len(job.new_leads or [])} novos", file=sys.stderr)
+
+    gravar_saida(new_leads, args)
+    print(f"{len(searches)} busca(s) salva(s) atualizada(s) · {len(new_leads)} leads novos", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="lead-gen", description="Gerador de leads do LinkedIn via N8N")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    search = subparsers.add_parser('search', help="busca leads e grava em NDJSON ou CSV")
+    search.add_argument('--terms', nargs='+', required=True, help="cargos executivos (ex.: CEO CMO Diretor)")
+    search.add_argument('--sector', choices=SETORES, default=SETORES[0], metavar='SETOR',
+                        help="setor/indústria (os mesmos do dashboard, ex.: \"Tecnologia/SaaS\")")
+    search.add_argument('--location', choices=LOCALIZACOES, default=LOCALIZACOES[0], metavar='LOCAL',
+                        help="localização (as mesmas do dashboard, ex.: \"São Paulo\")")
+    search.add_argument('--pages', type=intervalo_de_paginas, default=(0, 0),
+                        help="página inicial ou intervalo (ex.: 0 ou 0-4)")
+    search.add_argument('--num-results', type=int, default=10, help="resultados por página")
+    search.add_argument('--max-concurrency', type=int, default=MAX_CONCURRENT_PAGES,
+                        help="páginas buscadas em paralelo")
+    search.add_argument('--format', choices=OUTPUT_FORMATS, default='ndjson')
+    search.add_argument('--output', '-o', help="arquivo de saída (padrão: stdout)")
+    search.add_argument('--webhook-url', default=WEBHOOK_URL)
+    search.add_argument('--no-cache', action='store_true', help="ignora o cache de respostas")
+    search.add_argument('--no-known-profiles', action='store_true',
+                        help="não envia os perfis já conhecidos ao N8N")
+    search.set_defaults(func=comando_search)
+
+    refresh = subparsers.add_parser('refresh', help="atualiza buscas salvas e grava só os perfis novos")
+    refresh.add_argument('ids', nargs='*', help="ids das buscas salvas (padrão: as agendadas que já venceram)")
+    refresh.add_argument('--all', action='store_true', help="atualiza todas as buscas salvas")
+    refresh.add_argument('--list', action='store_true', help="lista as buscas salvas e sai")
+    refresh.add_argument('--max-concurrency', type=int, default=MAX_CONCURRENT_PAGES,
+                         help="páginas buscadas em paralelo")
+    refresh.add_argument('--format', choices=OUTPUT_FORMATS, default='ndjson')
+    refresh.add_argument('--output', '-o', help="arquivo de saída (padrão: stdout)")
+    refresh.add_argument('--webhook-url', default=WEBHOOK_URL)
+    refresh.set_defaults(func=comando_refresh)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""Cliente HTTP do webhook do N8N."""
+
+import gzip
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import (
+    BACKOFF_BASE_SECONDS, BACKOFF_MAX_SECONDS, CONNECT_TIMEOUT, GZIP_MIN_BYTES, HEDGE_MAX_RATIO, HEDGE_QUANTILE,
+    MAX_RETRIES, READ_TIMEOUT, RETRYABLE_STATUS,
+)
+from .resilience import CircuitBreaker, LatencyTracker
+
+
+def _em_segundo_plano(fn, *args):
+    """Executa fn em uma thread daemon (uma requisição perdida não segura o fim do processo); retorna um Future"""
+    future = Future()
+
+    def run():
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+    threading.Thread(target=run, daemon=True, name="n8n-request").start()
+    return future
+
+
+def _descartar(future):
+    """Fecha a resposta da requisição que perdeu a corrida do hedge, quando ela chegar"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+class WebhookClient:
+    """Cliente HTTP do N8N com pool de conexões keep-alive, gzip e retry com backoff exponencial.
+
+    O prazo de leitura de cada requisição se adapta à latência recente do mesmo formato de busca
+    (`shape`); se a resposta passar do p95, uma cópia é enviada (hedge, limitado a `hedge_max_ratio`
+    das requisições) e vale a que chegar primeiro. Depois de falhas seguidas, o circuit breaker
+    recusa requisições na hora em vez de deixar cada busca esperar o prazo inteiro.
+    """
+
+    def __init__(self, pool_size=16, max_retries=MAX_RETRIES, connect_timeout=CONNECT_TIMEOUT,
+                 read_timeout=READ_TIMEOUT, gzip_min_bytes=GZIP_MIN_BYTES, hedge_max_ratio=HEDGE_MAX_RATIO):
+        self.max_retries = max_retries
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.gzip_min_bytes = gzip_min_bytes
+        self.hedge_max_ratio = hedge_max_ratio
+        self.attempts = deque(maxlen=200)  # latência de cada tentativa
+        self.latency = LatencyTracker()
+        self.breaker = CircuitBreaker()
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0, 'hedges': 0, 'hedge_wins': 0, 'rejected': 0}
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+            "Content-Type": "application/json",
+        })
+
+    def _backoff(self, attempt):
+        # Full jitter: espera aleatória entre 0 e base * 2^tentativa (limitada)
+        return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+    def _record(self, url, attempt, started, status, error=None):
+        with self._lock:
+            self.attempts.append({
+                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'url': url,
+                'attempt': attempt,
+                'status': status,
+                'error': error,
+                'latency': round(time.perf_counter() - started, 3),
+            })
+
+    def _send(self, url, body, headers, stream, deadline, key):
+        """Uma requisição; a latência entra no histórico do formato (timeouts contam como o prazo inteiro)"""
+        started = time.perf_counter()
+        try:
+            response = self.session.post(
+                url, data=body, headers=headers, stream=stream,
+                timeout=(self.connect_timeout, deadline)
+            )
+        except requests.exceptions.ReadTimeout:
+            self.latency.add(key, deadline)
+            raise
+        if response.status_code not in RETRYABLE_STATUS:
+            self.latency.add(key, time.perf_counter() - started)
+        return response
+
+    def deadline(self, shape, stream=False):
+        """Prazo de leitura de uma requisição do formato `shape`.
+
+        Em streaming o prazo vale para cada leitura do corpo (iter_content), e não só até os cabeçalhos:
+        entre dois leads o N8N pode passar bem mais que o tempo até a primeira resposta, então fica o fixo.
+        """
+        if stream:
+            return self.read_timeout
+        return self.latency.deadline((shape, stream), self.read_timeout)
+
+    def _hedge_allowed(self):
+        with self._lock:
+            return self.stats['hedges'] < self.hedge_max_ratio * self.stats['requests']
+
+    def _hedged_send(self, url, body, headers, stream, key, deadline):
+        """Envia a requisição e, se ela passar do p95 do formato, uma cópia; retorna a primeira resposta
+
+        Em streaming a latência medida (e o hedge) é o tempo até os cabeçalhos.
+        """
+        hedge_after = self.latency.quantile(key, HEDGE_QUANTILE) if self.hedge_max_ratio > 0 else None
+        if hedge_after is None:
+            return self._send(url, body, headers, stream, deadline, key)
+
+        primary = _em_segundo_plano(self._send, url, body, headers, stream, deadline, key)
+        if not wait([primary], timeout=hedge_after).done and self._hedge_allowed():
+            with self._lock:
+                self.stats['hedges'] += 1
+            hedge = _em_segundo_plano(self._send, url, body, headers, stream, deadline, key)
+            pending = {primary, hedge}
+        else:
+            pending = {primary}
+
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                for loser in pending:
+                    loser.add_done_callback(_descartar)
+                if future is not primary:
+                    with self._lock:
+                        self.stats['hedge_wins'] += 1
+                return future.result()
+        raise error
+
+    def post_json(self, url, payload, stream=False, shape=None):
+        """POST do payload em JSON; tenta novamente em erros de conexão e status transitórios
+
+        Com stream=True o corpo não é lido aqui (response.iter_content) e o N8N pode responder em NDJSON.
+        `shape` identifica o formato da busca para o prazo adaptativo e o hedge. Se o prazo adaptativo
+        estourar, a requisição é refeita uma vez com o prazo fixo (read_timeout) sem contar como falha:
+        uma resposta mais lenta que o histórico não é um backend fora do ar.
+        """
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        headers = {"Accept": "application/x-ndjson, application/json;q=0.9"} if stream else {}
+        if len(body) >= self.gzip_min_bytes:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+
+        key = (shape, stream)
+        with self._lock:
+            self.stats['requests'] += 1
+        attempt = 0
+        extended = False  # prazo adaptativo já estourou uma vez: daqui em diante, prazo fixo
+        reissue = False   # refazendo com o prazo fixo: o circuito já liberou esta requisição
+        while True:
+            if not reissue:
+                try:
+                    self.breaker.allow()
+                except requests.exceptions.ConnectionError:
+                    with self._lock:
+                        self.stats['rejected'] += 1
+                        self.stats['failures'] += 1
+                    raise
+            reissue = False
+            deadline = self.read_timeout if extended else self.deadline(shape, stream)
+            started = time.perf_counter()
+            try:
+                response = self._hedged_send(url, body, headers, stream, key, deadline)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                self._record(url, attempt, started, None, type(e).__name__)
+                if isinstance(e, requests.exceptions.ReadTimeout) and deadline < self.read_timeout:
+                    extended = reissue = True
+                    with self._lock:
+                        self.stats['retries'] += 1
+                    attempt += 1
+                    continue
+                # Fora isso, ReadTimeout não é repetido: o N8N pode continuar processando a execução anterior
+                self.breaker.failure()
+                if isinstance(e, requests.exceptions.ReadTimeout) or attempt >= self.max_retries:
+                    with self._lock:
+                        self.stats['failures'] += 1
+                    raise
+            except BaseException as e:
+                # Demais erros não são repetidos, mas contam para o circuito (e liberam a requisição de teste)
+                self._record(url, attempt, started, None, type(e).__name__)
+                self.breaker.failure()
+                with self._lock:
+                    self.stats['failures'] += 1
+                raise
+            else:
+                self._record(url, attempt, started, response.status_code)
+                if response.status_code in RETRYABLE_STATUS:
+                    self.breaker.failure()
+                else:
+                    self.breaker.success()
+                if response.status_code not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                    if response.status_code != 200:
+                        with self._lock:
+                            self.stats['failures'] += 1
+                    response.attempts = attempt + 1
+                    return response
+                response.close()
+
+            with self._lock:
+                self.stats['retries'] += 1
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def latency_summary(self):
+        with self._lock:
+            latencies = sorted(a['latency'] for a in self.attempts)
+        if not latencies:
+            return None
+        return {
+            'count': len(latencies),
+            'avg': sum(latencies) / len(latencies),
+            'p50': latencies[len(latencies) // 2],
+            'max': latencies[-1],
+        }
@@ -0,0 +1,86 @@
+"""Configurações compartilhadas pelo dashboard e pela CLI (sobrescrevíveis por variáveis de ambiente)."""
+
+import os
+
+# Webhook do N8N
+WEBHOOK_URL = os.environ.get("LEADGEN_WEBHOOK_URL", "https://n8n.srv845413.hstgr.cloud/webhook/linkedin-leads-claude")
+
+# Cache de respostas do webhook
+CACHE_DIR = os.environ.get("LEADGEN_CACHE_DIR", ".leadgen_cache")
+CACHE_TTL_SECONDS = float(os.environ.get("LEADGEN_CACHE_TTL_HOURS", 6)) * 60 * 60
+CACHE_MAX_MEMORY_ENTRIES = 128
+CACHE_MAX_DISK_BYTES = 200 * 1024 * 1024
+
+# Resultados compartilhados entre sessões (em memória)
+SHARED_RESULTS_MAX_ENTRIES = 256
+
+# Estado das sessões (memória limitada; o excedente vai para disco)
+SESSION_DIR = os.path.join(CACHE_DIR, "sessions")
+SESSION_MEMORY_BUDGET_BYTES = float(os.environ.get("LEADGEN_SESSION_BUDGET_MB", 64)) * 1024 * 1024
+SESSION_RETENTION_SECONDS = 24 * 60 * 60
+HISTORY_MEMORY_ENTRIES = 50
+
+# Base de leads conhecidos (compartilhada entre buscas e sessões)
+LEAD_STORE_PATH = os.path.join(CACHE_DIR, "leads.sqlite3")
+BLOOM_ERROR_RATE = 0.01
+BLOOM_MIN_CAPACITY = 1024
+KNOWN_PROFILES_FIELD = "known_profiles"
+
+# Buscas salvas (atualização incremental e agendada)
+SAVED_SEARCH_PATH = os.path.join(CACHE_DIR, "saved_searches.sqlite3")
+SAVED_SEARCH_RUNS_KEPT = 10
+SAVED_SEARCH_POLL_SECONDS = 60
+
+# Analytics persistente (buscas de todas as sessões e da CLI)
+ANALYTICS_PATH = os.path.join(CACHE_DIR, "analytics.sqlite3")
+ANALYTICS_TREND_DAYS = 30
+ANALYTICS_TOP_CELLS = 10
+
+# Campanhas em lote
+CAMPAIGN_DIR = os.path.join(CACHE_DIR, "campaigns")
+CAMPAIGN_RATE_PER_MINUTE = 20
+CAMPAIGN_CONCURRENCY = 2
+# Limites do webhook somando todas as campanhas em andamento; os de cada campanha só reduzem sua parte
+CAMPAIGN_MAX_RATE_PER_MINUTE = float(os.environ.get("LEADGEN_CAMPAIGN_MAX_RATE", 60))
+CAMPAIGN_MAX_CONCURRENCY = int(os.environ.get("LEADGEN_CAMPAIGN_MAX_CONCURRENCY", 4))
+
+# Exportação
+EXPORT_DIR = os.path.join(CACHE_DIR, "exports")
+EXPORT_MAX_DISK_BYTES = 500 * 1024 * 1024
+EXPORT_CHUNK_ROWS = 10_000
+
+# Diagnósticos (métricas por fase das buscas)
+METRICS_DIR = os.path.join(CACHE_DIR, "metrics")
+METRICS_ENABLED = os.environ.get("LEADGEN_DIAGNOSTICS", "") == "1"
+METRICS_HISTORY = 50
+
+# Busca em intervalo de páginas
+MAX_CONCURRENT_PAGES = 4
+
+# Cliente HTTP do webhook
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 300
+MAX_RETRIES = 3
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 20.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+GZIP_MIN_BYTES = 1024
+
+# Prazos adaptativos, hedge e circuit breaker (READ_TIMEOUT vira o prazo máximo e o inicial)
+LATENCY_WINDOW = 200
+LATENCY_MIN_SAMPLES = 20
+DEADLINE_MULTIPLIER = 3.0
+DEADLINE_MIN_SECONDS = 15
+HEDGE_QUANTILE = 0.95
+HEDGE_MAX_RATIO = float(os.environ.get("LEADGEN_HEDGE_RATIO", 0.1))
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 30
+
+# Respostas em streaming (NDJSON ou JSON em blocos): leads aparecem conforme o N8N os envia
+STREAM_RESPONSES = os.environ.get("LEADGEN_STREAM", "") == "1"
+STREAM_CHUNK_BYTES = 16 * 1024
+STREAM_FLUSH_SECONDS = 0.25
+
+# Fila de buscas em segundo plano
+MAX_CONCURRENT_JOBS = 3
+JOB_RETENTION_SECONDS = 60 * 60
@@ -0,0 +1,111 @@
+"""Regras de negócio sem dependências pesadas: query, payload, normalização e classificação dos leads."""
+
+import hashlib
+import re
+
+POTENCIAIS = ['ALTO', 'MÉDIO', 'BAIXO']
+
+SETORES = [
+    "Todos os setores",
+    "Tecnologia/SaaS",
+    "E-commerce/Varejo",
+    "Serviços Financeiros",
+    "Saúde/Farmacêutico",
+    "Educação/EdTech",
+    "Imobiliário/PropTech",
+    "Manufatura/Indústria",
+    "Consultoria/Serviços",
+    "Marketing/Agências",
+    "Logística/Transporte",
+]
+
+LOCALIZACOES = [
+    "Brasil",
+    "São Paulo", "Rio de Janeiro", "Belo Horizonte", "Porto Alegre", "Salvador",
+    "Brasília", "Fortaleza", "Recife", "Curitiba", "Manaus",
+    "Belém", "Goiânia", "Guarulhos", "Campinas", "São Luís",
+    "Maceió", "Campo Grande", "Teresina", "João Pessoa", "Vitória",
+]
+
+
+def montar_query(executive_terms, sector, location):
+    """Monta a query do Google a partir dos cargos, setor e localização"""
+    query_terms = " OR ".join(executive_terms)
+    sector_query = f" {sector.split('/')[0].lower()}" if sector != "Todos os setores" else ""
+    return f"site:linkedin.com/in ({query_terms}){sector_query} {location}"
+
+
+def montar_payload(executive_terms, sector, location, num_results, start_page):
+    """Payload enviado ao webhook do N8N"""
+    return {
+        "query": montar_query(executive_terms, sector, location),
+        "num_results": num_results,
+        "start_page": start_page,
+        "location": location,
+        "executive_terms": executive_terms,
+        "sector": sector
+    }
+
+
+def extrair_leads(result_data):
+    """Normaliza a resposta do N8N Aggregate em uma lista de leads"""
+    if 'leads' in result_data:
+        leads = result_data['leads']
+        # Se leads é um objeto com 'data', extrair o array
+        if isinstance(leads, dict) and 'data' in leads:
+            leads = leads['data']
+        # Se leads não é uma lista, transformar em lista
+        elif not isinstance(leads, list):
+            leads = [leads]
+    else:
+        leads = []
+    return leads
+
+
+def normalizar_link(link):
+    """Normaliza a URL do perfil para comparação (sem protocolo, www, subdomínio de país, query ou barra final)"""
+    link = (link or '').strip().lower()
+    link = re.sub(r'^https?://', '', link)
+    link = re.sub(r'^([a-z]{2,3}|www)\.linkedin\.com', 'linkedin.com', link)
+    link = link.split('?')[0].split('#')[0]
+    return link.rstrip('/')
+
+
+def hash_perfil(link):
+    """SHA-256 (hex) da URL normalizada do perfil; None para leads sem link"""
+    normalizado = normalizar_link(link)
+    if not normalizado:
+        return None
+    return hashlib.sha256(normalizado.encode('utf-8')).hexdigest()
+
+
+def mesclar_leads(leads, novos, vistos):
+    """Adiciona a `leads` os novos leads cujo link normalizado ainda não está em `vistos`"""
+    adicionados = 0
+    for lead in novos:
+        chave = normalizar_link(lead.get('link'))
+        if chave:
+            if chave in vistos:
+                continue
+            vistos.add(chave)
+        leads.append(lead)
+        adicionados += 1
+    return adicionados
+
+
+def classificar_potencial(analise):
+    """Classifica o lead pela análise da IA (ALTO tem prioridade sobre MÉDIO)"""
+    analise = analise or ''
+    if 'ALTO' in analise:
+        return 'ALTO'
+    if 'MÉDIO' in analise:
+        return 'MÉDIO'
+    return 'BAIXO'
+
+
+def contar_potencial_leads(leads):
+    """Contagem por potencial direto da lista de leads (sem montar tabela)"""
+    counts = {potencial: 0 for potencial in POTENCIAIS}
+    for lead in leads:
+        counts[classificar_potencial(lead.get('analise'))] += 1
+    return counts
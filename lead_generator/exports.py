@@ -0,0 +1,116 @@
+"""Exportação dos leads e do histórico em CSV, Parquet e XLSX, com cache em disco.
+
+pyarrow e openpyxl são opcionais e só são importados ao gerar o respectivo formato.
+"""
+
+import importlib.util
+import json
+import math
+import os
+import threading
+
+from .config import EXPORT_CHUNK_ROWS, EXPORT_MAX_DISK_BYTES
+
+EXPORT_FORMATS = {
+    'CSV': {'ext': 'csv', 'mime': 'text/csv', 'module': None},
+    'Parquet': {'ext': 'parquet', 'mime': 'application/vnd.apache.parquet', 'module': 'pyarrow'},
+    'Excel (XLSX)': {'ext': 'xlsx', 'mime': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'module': 'openpyxl'},
+}
+
+
+class ExportCache:
+    """Arquivos exportados em disco, chaveados pelo hash do conteúdo + filtros + formato."""
+
+    def __init__(self, directory, max_disk_bytes=EXPORT_MAX_DISK_BYTES):
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def get_or_build(self, key, ext, builder):
+        """Caminho do arquivo para `key`; `builder(path)` só é chamado se ele ainda não existir"""
+        path = os.path.join(self.directory, f"{key}.{ext}")
+        with self._lock:
+            if os.path.exists(path):
+                os.utime(path)
+                return path
+            tmp_path = f"{path}.tmp"
+            builder(tmp_path)
+            os.replace(tmp_path, path)
+            self._evict()
+        return path
+
+    def _evict(self):
+        files = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if not name.endswith('.tmp')]
+        files.sort(key=os.path.getmtime)
+        total = sum(os.path.getsize(f) for f in files)
+        for f in files[:-1]:
+            if total <= self.max_disk_bytes:
+                break
+            total -= os.path.getsize(f)
+            os.remove(f)
+
+
+def formatos_exportacao():
+    """Formatos de exportação disponíveis (Parquet e XLSX dependem de pacotes opcionais)"""
+    return [name for name, fmt in EXPORT_FORMATS.items()
+            if fmt['module'] is None or importlib.util.find_spec(fmt['module']) is not None]
+
+
+def _celula_excel(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value
+
+
+def _celula_texto(value):
+    """Valor de uma coluna de tipos misturados como texto (listas e objetos em JSON, vazios como nulo)"""
+    value = _celula_excel(value)
+    return value if value is None or isinstance(value, str) else str(value)
+
+
+def _colunas_parquet(df):
+    """Colunas de objetos com listas, dicionários ou tipos misturados viram texto, como no XLSX
+
+    A saída do N8N é JSON livre; sem isso o pyarrow recusa a tabela (ex.: "cannot mix struct and non-struct").
+    """
+    texto = {}
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        tipos = {type(value) for value in df[col] if _celula_excel(value) is not None}
+        if len(tipos) > 1 or tipos & {list, dict}:
+            texto[col] = df[col].map(_celula_texto)
+    return df.assign(**texto) if texto else df
+
+
+def escrever_exportacao(df, path, ext):
+    """Grava a tabela em disco em blocos de EXPORT_CHUNK_ROWS linhas, sem montar o arquivo inteiro em memória"""
+    if ext == 'parquet':
+        df = _colunas_parquet(df)
+    chunks = (df.iloc[start:start + EXPORT_CHUNK_ROWS] for start in range(0, max(len(df), 1), EXPORT_CHUNK_ROWS))
+    
+    if ext == 'csv':
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, index=False, header=i == 0)
+    
+    elif ext == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+        with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+            for chunk in chunks:
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    
+    elif ext == 'xlsx':
+        from openpyxl import Workbook
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Dados")
+        ws.append([str(col) for col in df.columns])
+        for chunk in chunks:
+            for row in chunk.itertuples(index=False):
+                ws.append([_celula_excel(value) for value in row])
+        wb.save(path)
@@ -0,0 +1,182 @@
+"""Histórico de buscas de uma sessão com registros compactos e memória limitada."""
+
+import hashlib
+import json
+import sys
+from collections import deque
+
+from .config import HISTORY_MEMORY_ENTRIES
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class HistoryEntry:
+    """Uma busca do histórico; strings repetidas entre buscas (local, setor, cargos, query) são internadas."""
+
+    PARAM_FIELDS = ('num_results', 'start_page', 'end_page')
+    __slots__ = ('timestamp', 'query', 'results_count', 'location', 'sector', 'executive_terms',
+                 'alto_potencial', 'medio_potencial', 'baixo_potencial', 'conversion_rate',
+                 'num_results', 'start_page', 'end_page')
+
+    def __init__(self, timestamp, query, results_count, location, sector, executive_terms,
+                 alto_potencial, medio_potencial, baixo_potencial, conversion_rate,
+                 num_results, start_page, end_page):
+        self.timestamp = timestamp
+        self.query = _intern(query)
+        self.results_count = results_count
+        self.location = _intern(location)
+        self.sector = _intern(sector)
+        self.executive_terms = _intern(executive_terms)
+        self.alto_potencial = alto_potencial
+        self.medio_potencial = medio_potencial
+        self.baixo_potencial = baixo_potencial
+        self.conversion_rate = conversion_rate
+        self.num_results = num_results
+        self.start_page = start_page
+        self.end_page = end_page
+
+    @classmethod
+    def from_search(cls, timestamp, payload, results_count, counts):
+        conversion_rate = (counts['ALTO'] / results_count * 100) if results_count else 0
+        return cls(
+            timestamp, payload['query'], results_count, payload['location'], payload['sector'],
+            ', '.join(payload['executive_terms']), counts['ALTO'], counts['MÉDIO'], counts['BAIXO'],
+            round(conversion_rate, 1), payload['num_results'], payload['start_page'],
+            payload.get('end_page', payload['start_page'])
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        params = data.get('search_params', {})
+        return cls(
+            data['timestamp'], data.get('query', ''), data['results_count'], data['location'], data['sector'],
+            data['executive_terms'], data.get('alto_potencial', 0), data.get('medio_potencial', 0),
+            data.get('baixo_potencial', 0), data.get('conversion_rate', 0), params.get('num_results', 10),
+            params.get('start_page', 0), params.get('end_page', params.get('start_page', 0))
+        )
+
+    @property
+    def search_params(self):
+        """Parâmetros para repetir a busca (montados na hora, não guardados em duplicata)"""
+        return {
+            'executive_terms': self.executive_terms,
+            'sector': self.sector,
+            'location': self.location,
+            'num_results': self.num_results,
+            'start_page': self.start_page,
+            'end_page': self.end_page,
+        }
+
+    def to_dict(self):
+        """Mesmo formato das entradas do histórico em dict (exportação e disco)"""
+        data = {name: getattr(self, name) for name in self.__slots__ if name not in self.PARAM_FIELDS}
+        data['search_params'] = self.search_params
+        return data
+
+    # Acesso como dicionário, para o código que ainda trata entradas do histórico como dicts
+    def __getitem__(self, name):
+        if name not in self.__slots__ and name != 'search_params':
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+
+class SessionHistory:
+    """Histórico de uma sessão: as `memory_entries` buscas mais recentes em memória e as demais em disco.
+
+    Totais, tendências por local/setor e o hash do conteúdo são mantidos a cada busca, então as
+    métricas da aba de histórico não precisam ler as entradas antigas.
+    """
+
+    def __init__(self, spill_factory, memory_entries=HISTORY_MEMORY_ENTRIES):
+        self.memory_entries = memory_entries
+        self._spill_factory = spill_factory  # cria o SpillStore da sessão na primeira vez que for preciso
+        self._spill = None
+        self.clear()
+
+    def clear(self):
+        self._recent = deque()  # (seq, HistoryEntry), da mais antiga para a mais nova
+        self.size = 0
+        self.total_leads = 0
+        self._conversion_sum = 0.0
+        self._trends = {'location': {}, 'sector': {}}  # valor -> [buscas, leads, soma das conversões]
+        self._digest = hashlib.sha256()
+        if self._spill is not None:
+            self._spill.clear_history()
+
+    def append(self, entry):
+        seq = self.size
+        self._recent.append((seq, entry))
+        self.size += 1
+        self.total_leads += entry.results_count
+        self._conversion_sum += entry.conversion_rate
+        for field, stats in self._trends.items():
+            totals = stats.setdefault(getattr(entry, field), [0, 0, 0.0])
+            totals[0] += 1
+            totals[1] += entry.results_count
+            totals[2] += entry.conversion_rate
+        self._digest.update(json.dumps(entry.to_dict(), sort_keys=True, ensure_ascii=False).encode('utf-8'))
+
+        while len(self._recent) > self.memory_entries:
+            old_seq, old = self._recent.popleft()
+            if self._spill is None:
+                self._spill = self._spill_factory()
+            self._spill.append_history(old_seq, old.to_dict())
+
+    def __len__(self):
+        return self.size
+
+    def __bool__(self):
+        return self.size > 0
+
+    @property
+    def in_memory(self):
+        return len(self._recent)
+
+    @property
+    def avg_conversion(self):
+        return self._conversion_sum / self.size if self.size else 0
+
+    def digest(self):
+        return self._digest.hexdigest()
+
+    def newest(self, offset=0, limit=10):
+        """Lista de (seq, entrada) da mais nova para a mais antiga; as que estão em disco são lidas sob demanda"""
+        hi = self.size - offset            # seqs em [lo, hi)
+        lo = max(0, hi - limit)
+        first_in_memory = self.size - len(self._recent)
+        result = [(seq, entry) for seq, entry in reversed(self._recent) if lo <= seq < hi]
+        if lo < first_in_memory and self._spill is not None:
+            disk_hi = min(hi, first_in_memory)
+            rows = self._spill.history(lo, disk_hi)
+            result.extend((disk_hi - 1 - i, HistoryEntry.from_dict(row)) for i, row in enumerate(rows))
+        return result
+
+    def snapshot(self):
+        """Função que lista as entradas atuais como dicts, da mais antiga para a mais nova.
+
+        Pode ser chamada depois, em outra thread (exportação no clique): o que está em memória é
+        copiado agora e o disco é lido só até a última entrada que já estava lá.
+        """
+        spill = self._spill
+        first_in_memory = self.size - len(self._recent)
+        recent = [entry.to_dict() for _, entry in self._recent]
+
+        def rows():
+            disk = list(spill.iter_history(until=first_in_memory)) if spill is not None else []
+            return disk + recent
+        return rows
+
+    def trends(self, field):
+        """(valor, leads por busca, conversão média) por local ou setor"""
+        return [
+            (value, round(leads / count, 1), round(conversion / count, 1))
+            for value, (count, leads, conversion) in sorted(self._trends[field].items())
+        ]
@@ -0,0 +1,69 @@
+"""Índice invertido para a busca textual nos leads."""
+
+import bisect
+import re
+import sys
+import unicodedata
+
+
+class LeadSearchIndex:
+    """Índice invertido dos leads: sem acentos, por prefixo e com AND entre os termos."""
+
+    TOKEN_RE = re.compile(r"\w+")
+
+    def __init__(self):
+        self._postings = {}  # token -> ids dos leads
+        self._tokens = []    # vocabulário ordenado, para busca por prefixo
+        self.size = 0
+
+    @staticmethod
+    def fold(text):
+        """Minúsculas e sem acentos ("São" -> "sao")"""
+        decomposed = unicodedata.normalize('NFKD', text or '')
+        return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+    def tokenize(self, text):
+        return self.TOKEN_RE.findall(self.fold(text))
+
+    def add(self, doc_id, *texts):
+        for text in texts:
+            for token in self.tokenize(text):
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = set()
+                    bisect.insort(self._tokens, token)
+                postings.add(doc_id)
+        self.size += 1
+
+    def memory_usage(self):
+        """Bytes aproximados do índice (vocabulário e listas de ids)"""
+        total = sys.getsizeof(self._postings) + sys.getsizeof(self._tokens)
+        for token, postings in self._postings.items():
+            total += sys.getsizeof(token) + sys.getsizeof(postings)
+        return total
+
+    def _prefix_matches(self, prefix):
+        start = bisect.bisect_left(self._tokens, prefix)
+        end = bisect.bisect_left(self._tokens, prefix + '\U0010ffff')
+        if end - start == 1:
+            return self._postings[self._tokens[start]]
+        matches = set()
+        for token in self._tokens[start:end]:
+            matches |= self._postings[token]
+        return matches
+
+    def search(self, query):
+        """Ids dos leads que contêm todos os termos da consulta (cada termo como prefixo)
+
+        None se a consulta não tiver nenhum termo (ex.: só pontuação): nada a filtrar.
+        """
+        terms = set(self.tokenize(query))
+        if not terms:
+            return None
+        result = None
+        for term in sorted(terms, key=len, reverse=True):
+            matches = self._prefix_matches(term)
+            result = set(matches) if result is None else result & matches
+            if not result:
+                return set()
+        return result
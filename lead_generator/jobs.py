@@ -0,0 +1,98 @@
+"""Fila de buscas em segundo plano."""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import JOB_RETENTION_SECONDS, MAX_CONCURRENT_JOBS
+
+JOB_FINISHED_STATUSES = {'done', 'failed', 'cancelled'}
+
+
+class SearchJob:
+    """Busca executada em segundo plano (uma página ou um intervalo de páginas)."""
+
+    def __init__(self, payload, end_page, max_workers, send_known=False, fresh=False, saved_id=None, max_age=None,
+                 stream=None):
+        self.id = uuid.uuid4().hex[:8]
+        self.payload = payload
+        self.end_page = end_page
+        self.max_workers = max_workers
+        self.send_known = send_known
+        self.fresh = fresh          # ignora cache e resultados compartilhados (atualização de busca salva)
+        self.saved_id = saved_id
+        self.max_age = max_age      # idade máxima (s) das respostas em cache aceitas; None = TTL do processo
+        self.stream = stream        # lê as respostas em streaming; None = padrão do serviço
+        self.trace = None
+        self.status = 'queued'
+        self.pages_total = end_page - payload['start_page'] + 1
+        self.pages_done = 0
+        self.leads = []
+        self.result = None  # SharedResult quando a busca é compartilhada entre sessões
+        self.new_leads = None  # perfis que a busca salva ainda não tinha visto
+        self.errors = []
+        self.created_at = time.time()
+        self.finished_at = None
+        self.ingested = False
+        self.future = None
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in JOB_FINISHED_STATUSES
+
+    def set_status(self, status):
+        # Um job cancelado não volta a mudar de status
+        if not self.cancel_event.is_set():
+            self.status = status
+
+
+class SearchJobManager:
+    """Pool de workers que executa os jobs de busca fora da thread do script do Streamlit."""
+
+    def __init__(self, max_workers=MAX_CONCURRENT_JOBS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="busca")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, job, worker):
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(self._run, job, worker)
+        return job
+
+    def _run(self, job, worker):
+        try:
+            if not job.cancel_event.is_set():
+                worker(job)
+        except Exception as e:
+            job.errors.append(str(e))
+            job.set_status('failed')
+        finally:
+            if not job.cancel_event.is_set():
+                job.finished_at = time.time()
+                job.done_event.set()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return
+        # Requisições já em andamento não podem ser interrompidas; o resultado delas é descartado
+        job.cancel_event.set()
+        if job.future is not None:
+            job.future.cancel()
+        job.status = 'cancelled'
+        job.finished_at = time.time()
+        job.done_event.set()
+
+    def _prune(self):
+        limit = time.time() - JOB_RETENTION_SECONDS
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < limit]:
+            del self._jobs[job_id]
@@ -0,0 +1,142 @@
+"""Instrumentação das buscas: spans de tempo por fase, contadores e exportação (JSON e Prometheus)."""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+
+from .config import METRICS_ENABLED, METRICS_HISTORY
+
+logger = logging.getLogger("leadgen")
+
+
+class _Span:
+    __slots__ = ('metrics', 'trace', 'phase', 'started')
+
+    def __init__(self, metrics, trace, phase):
+        self.metrics = metrics
+        self.trace = trace
+        self.phase = phase
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.metrics.add_time(self.trace, self.phase, time.perf_counter() - self.started)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Metrics:
+    """Spans de tempo por fase e contadores de cada busca; sem custo quando desligado (trace None)."""
+
+    def __init__(self, directory, enabled=METRICS_ENABLED, history=METRICS_HISTORY):
+        self.directory = directory
+        self.enabled = enabled
+        self.traces = deque(maxlen=history)
+        self.phase_totals = {}   # fase -> [contagem, segundos]
+        self.render_totals = {}  # aba -> [contagem, segundos]
+        self.counters = {}
+        self._lock = threading.Lock()
+        self.log_path = os.path.join(directory, "searches.ndjson")
+        self.prometheus_path = os.path.join(directory, "leadgen.prom")
+
+    def start_trace(self, label):
+        if not self.enabled:
+            return None
+        return {
+            'id': uuid.uuid4().hex[:8],
+            'label': label,
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'spans': {},
+            'counters': {},
+            '_started': time.perf_counter(),
+        }
+
+    def span(self, trace, phase):
+        return _NULL_SPAN if trace is None else _Span(self, trace, phase)
+
+    def add_time(self, trace, phase, seconds):
+        with self._lock:
+            trace['spans'][phase] = trace['spans'].get(phase, 0.0) + seconds
+            totals = self.phase_totals.setdefault(phase, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+
+    def count(self, trace, name, value=1):
+        if trace is None:
+            return
+        with self._lock:
+            trace['counters'][name] = trace['counters'].get(name, 0) + value
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_render(self, tab, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            totals = self.render_totals.setdefault(tab, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+
+    def finish_trace(self, trace, **fields):
+        """Fecha o trace, guarda nos últimos N e grava uma linha JSON no log estruturado"""
+        if trace is None:
+            return
+        trace['total'] = time.perf_counter() - trace.pop('_started')
+        trace.update(fields)
+        with self._lock:
+            self.traces.append(trace)
+            self.counters['searches'] = self.counters.get('searches', 0) + 1
+        line = json.dumps(trace, ensure_ascii=False)
+        logger.info(line)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+
+    def prometheus_text(self, external_counters):
+        """Métricas no formato texto do Prometheus; `external_counters` = [(nome, labels, valor, ajuda)]"""
+        lines = []
+        with self._lock:
+            summaries = [
+                ('leadgen_phase_seconds', 'phase', self.phase_totals, "Tempo gasto em cada fase das buscas"),
+                ('leadgen_render_seconds', 'tab', self.render_totals, "Tempo de renderização de cada aba"),
+            ]
+            for name, label, totals, help_text in summaries:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} summary"]
+                for key, (count, seconds) in sorted(totals.items()):
+                    lines.append(f'{name}_sum{{{label}="{key}"}} {seconds:.6f}')
+                    lines.append(f'{name}_count{{{label}="{key}"}} {count}')
+            counters = [(f"leadgen_{k}_total", {}, v, "Contador das buscas instrumentadas")
+                        for k, v in sorted(self.counters.items())]
+
+        seen = set()
+        for name, labels, value, help_text in counters + list(external_counters):
+            if name not in seen:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                seen.add(name)
+            label_text = ','.join(f'{k}="{v}"' for k, v in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, external_counters):
+        """Arquivo para o textfile collector do node_exporter (escrita atômica)"""
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.prometheus_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text(external_counters))
+        os.replace(tmp_path, self.prometheus_path)
@@ -0,0 +1,111 @@
+"""Latência por formato de busca (prazos adaptativos e hedge) e circuit breaker do webhook."""
+
+import threading
+import time
+from collections import deque
+
+import requests
+
+from .config import (
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS, DEADLINE_MIN_SECONDS, DEADLINE_MULTIPLIER,
+    LATENCY_MIN_SAMPLES, LATENCY_WINDOW,
+)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """O N8N falhou seguidamente; requisições são recusadas na hora até o circuito ser testado de novo."""
+
+
+class LatencyTracker:
+    """Janela das últimas latências por formato de busca (ex.: num_results e setor).
+
+    Com amostras suficientes, o prazo de uma requisição passa a ser p99 × `multiplier` (entre
+    `min_deadline` e o prazo fixo) e o p95 indica quando vale mandar uma cópia da requisição.
+    """
+
+    def __init__(self, window=LATENCY_WINDOW, min_samples=LATENCY_MIN_SAMPLES,
+                 multiplier=DEADLINE_MULTIPLIER, min_deadline=DEADLINE_MIN_SECONDS):
+        self.window = window
+        self.min_samples = min_samples
+        self.multiplier = multiplier
+        self.min_deadline = min_deadline
+        self._samples = {}  # formato -> deque de segundos
+        self._lock = threading.Lock()
+
+    def add(self, key, seconds):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def quantile(self, key, q):
+        """Quantil q das latências do formato, ou None se ainda não houver amostras suficientes"""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def deadline(self, key, default):
+        """Prazo adaptativo do formato (p99 × multiplicador), limitado ao prazo fixo `default`"""
+        p99 = self.quantile(key, 0.99)
+        if p99 is None:
+            return default
+        return min(default, max(self.min_deadline, p99 * self.multiplier))
+
+    def summary(self, default):
+        """(formato, amostras, p50, p95, prazo) de cada formato com amostras"""
+        with self._lock:
+            keys = list(self._samples)
+        rows = []
+        for key in keys:
+            with self._lock:
+                count = len(self._samples[key])
+            rows.append((key, count, self.quantile(key, 0.5), self.quantile(key, 0.95), self.deadline(key, default)))
+        return rows
+
+
+class CircuitBreaker:
+    """Abre depois de `failure_threshold` falhas seguidas; aberto, recusa requisições por `reset_seconds`
+    e então deixa passar uma de teste (meio aberto), que fecha o circuito se der certo."""
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_seconds=CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def retry_in(self):
+        """Segundos até o circuito aberto deixar passar uma requisição de teste"""
+        if self.state != 'open':
+            return 0.0
+        return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+    def allow(self):
+        """Libera uma requisição ou levanta CircuitOpenError"""
+        with self._lock:
+            if self.state == 'closed':
+                return
+            if self.state == 'open' and self.retry_in() == 0:
+                self.state = 'half_open'
+                self._trial_running = False
+            if self.state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return
+            wait = f" (nova tentativa em {self.retry_in():.0f}s)" if self.state == 'open' else ""
+            raise CircuitOpenError(f"N8N indisponível após {self.failures} falhas seguidas{wait}")
+
+    def success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._trial_running = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                self._trial_running = False
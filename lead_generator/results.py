@@ -0,0 +1,131 @@
+"""Resultados de busca compartilhados entre sessões, com requisições idênticas agrupadas (single-flight)."""
+
+import threading
+import time
+from collections import OrderedDict
+
+from .config import CACHE_TTL_SECONDS, SHARED_RESULTS_MAX_ENTRIES
+
+
+class SharedResult:
+    """Leads de uma busca (imutáveis) e os objetos derivados deles, montados uma vez por processo."""
+
+    def __init__(self, leads):
+        self.leads = tuple(leads)
+        self.created_at = time.time()
+        self._derived = {}
+        self._lock = threading.Lock()
+
+    def derive(self, name, build):
+        """Objeto derivado dos leads (tabela, índice...), montado só na primeira chamada"""
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = build()
+            return self._derived[name]
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SharedResults:
+    """Resultados por chave de busca (LRU + TTL); cargas simultâneas da mesma chave viram uma só.
+
+    Quem chega enquanto a chave está sendo carregada espera a carga em andamento e recebe o mesmo
+    SharedResult, então o backend e a memória crescem com o número de buscas distintas, não de usuários.
+    """
+
+    def __init__(self, ttl_seconds=CACHE_TTL_SECONDS, max_entries=SHARED_RESULTS_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'coalesced': 0, 'loads': 0}
+        self._entries = OrderedDict()  # chave -> SharedResult
+        self._inflight = {}            # chave -> _Flight
+        self._lock = threading.Lock()
+
+    def _lookup(self, key, now, max_age=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now - entry.created_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        if max_age is not None and now - entry.created_at > max_age:
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key, max_age=None):
+        with self._lock:
+            entry = self._lookup(key, time.time(), max_age)
+            if entry is not None:
+                self.stats['hits'] += 1
+            return entry
+
+    def load(self, key, loader, max_age=None):
+        """SharedResult da chave, chamando loader() (que retorna os leads) só se ninguém mais estiver carregando.
+
+        Retorna (resultado, origem), com origem 'hit', 'coalesced' ou 'loaded'. Erros do loader
+        chegam a todos que esperavam pela mesma carga e nada fica guardado. Resultados mais
+        antigos que `max_age` (segundos) são carregados de novo.
+        """
+        with self._lock:
+            entry = self._lookup(key, time.time(), max_age)
+            if entry is not None:
+                self.stats['hits'] += 1
+                return entry, 'hit'
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.stats['loads'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, 'coalesced'
+
+        try:
+            flight.result = SharedResult(loader())
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            with self._lock:
+                self._store(key, flight.result)
+            return flight.result, 'loaded'
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+
+    def publish(self, key, leads):
+        """Guarda o resultado de uma busca concluída; se já houver um válido para a chave, reaproveita o existente"""
+        with self._lock:
+            entry = self._lookup(key, time.time())
+            if entry is None or entry.leads != tuple(leads):
+                entry = SharedResult(leads)
+                self._store(key, entry)
+            return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for k in self.stats:
+                self.stats[k] = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,199 @@
+"""Buscas salvas com atualização incremental: só os perfis ainda não vistos pela busca contam como novos."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from .config import SAVED_SEARCH_POLL_SECONDS, SAVED_SEARCH_RUNS_KEPT
+from .core import hash_perfil
+from .jobs import SearchJob
+from .metrics import logger
+
+
+def proxima_execucao(hour, now=None):
+    """Próximo horário `hour`:00 (hora local) depois de `now`"""
+    now = time.time() if now is None else now
+    slot = datetime.fromtimestamp(now).replace(hour=hour, minute=0, second=0, microsecond=0)
+    if slot.timestamp() <= now:
+        slot += timedelta(days=1)
+    return slot.timestamp()
+
+
+class SavedSearchStore:
+    """Buscas salvas, os perfis já vistos por cada uma e as últimas atualizações (SQLite)."""
+
+    def __init__(self, db_path, runs_kept=SAVED_SEARCH_RUNS_KEPT):
+        self.runs_kept = runs_kept
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS saved ("
+            " id TEXT PRIMARY KEY, payload TEXT, end_page INTEGER, created_at REAL,"
+            " schedule_hour INTEGER, next_run_at REAL, last_run_at REAL, last_total INTEGER, last_new INTEGER);"
+            "CREATE TABLE IF NOT EXISTS seen ("
+            " saved_id TEXT, url_hash TEXT, first_seen REAL, PRIMARY KEY (saved_id, url_hash));"
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " saved_id TEXT, ran_at REAL, total INTEGER, new_count INTEGER, new_leads TEXT);"
+            "CREATE INDEX IF NOT EXISTS runs_saved ON runs (saved_id, ran_at);"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_id(payload, end_page):
+        canonical = json.dumps({**payload, "end_page": end_page}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:12]
+
+    def _row(self, row):
+        keys = ('id', 'payload', 'end_page', 'created_at', 'schedule_hour', 'next_run_at',
+                'last_run_at', 'last_total', 'last_new')
+        saved = dict(zip(keys, row))
+        saved['payload'] = json.loads(saved['payload'])
+        return saved
+
+    def save(self, payload, end_page, baseline=None):
+        """Salva a busca (se ainda não existir) e retorna o id.
+
+        `baseline` são leads de uma execução anterior (ex.: respostas em cache): marcados como vistos,
+        não aparecem como novos na primeira atualização.
+        """
+        saved_id = self.make_id(payload, end_page)
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO saved (id, payload, end_page, created_at) VALUES (?, ?, ?, ?)",
+                (saved_id, json.dumps(payload, ensure_ascii=False), end_page, now)
+            )
+            if cursor.rowcount and baseline:
+                self._mark_seen(saved_id, baseline, now)
+            self._conn.commit()
+        return saved_id
+
+    def get(self, saved_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM saved WHERE id = ?", (saved_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def list(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM saved ORDER BY created_at DESC").fetchall()
+        return [self._row(row) for row in rows]
+
+    def remove(self, saved_id):
+        with self._lock:
+            for table, column in (('saved', 'id'), ('seen', 'saved_id'), ('runs', 'saved_id')):
+                self._conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (saved_id,))
+            self._conn.commit()
+
+    def set_schedule(self, saved_id, hour):
+        """Atualização diária na hora `hour` (hora local), ou só manual com None"""
+        next_run = proxima_execucao(hour) if hour is not None else None
+        with self._lock:
+            self._conn.execute("UPDATE saved SET schedule_hour = ?, next_run_at = ? WHERE id = ?",
+                               (hour, next_run, saved_id))
+            self._conn.commit()
+
+    def claim_due(self, now=None):
+        """Buscas agendadas que já venceram; o próximo horário é reservado antes de executar,
+        para que o agendador do dashboard e um cron com a CLI não rodem a mesma atualização duas vezes"""
+        now = time.time() if now is None else now
+        claimed = []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM saved WHERE next_run_at IS NOT NULL AND next_run_at <= ?", (now,)
+            ).fetchall()
+            for row in rows:
+                saved = self._row(row)
+                cursor = self._conn.execute(
+                    "UPDATE saved SET next_run_at = ? WHERE id = ? AND next_run_at = ?",
+                    (proxima_execucao(saved['schedule_hour'], now), saved['id'], saved['next_run_at'])
+                )
+                if cursor.rowcount:
+                    claimed.append(saved)
+            self._conn.commit()
+        return claimed
+
+    def _mark_seen(self, saved_id, leads, now):
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO seen (saved_id, url_hash, first_seen) VALUES (?, ?, ?)",
+            ((saved_id, key, now) for key in {hash_perfil(lead.get('link')) for lead in leads} - {None})
+        )
+
+    def record_run(self, saved_id, leads):
+        """Registra uma atualização e retorna os leads cujo link a busca ainda não tinha visto"""
+        now = time.time()
+        with self._lock:
+            seen = {row[0] for row in self._conn.execute("SELECT url_hash FROM seen WHERE saved_id = ?", (saved_id,))}
+            new_leads = []
+            for lead in leads:
+                key = hash_perfil(lead.get('link'))
+                if key is not None and key not in seen:
+                    seen.add(key)
+                    new_leads.append(lead)
+            self._mark_seen(saved_id, new_leads, now)
+            self._conn.execute(
+                "UPDATE saved SET last_run_at = ?, last_total = ?, last_new = ? WHERE id = ?",
+                (now, len(leads), len(new_leads), saved_id)
+            )
+            self._conn.execute(
+                "INSERT INTO runs (saved_id, ran_at, total, new_count, new_leads) VALUES (?, ?, ?, ?, ?)",
+                (saved_id, now, len(leads), len(new_leads), json.dumps(new_leads, ensure_ascii=False))
+            )
+            self._conn.execute(
+                "DELETE FROM runs WHERE saved_id = ? AND ran_at NOT IN "
+                "(SELECT ran_at FROM runs WHERE saved_id = ? ORDER BY ran_at DESC LIMIT ?)",
+                (saved_id, saved_id, self.runs_kept)
+            )
+            self._conn.commit()
+        return new_leads
+
+    def last_new_leads(self, saved_id):
+        """Leads novos da última atualização"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT new_leads FROM runs WHERE saved_id = ? ORDER BY ran_at DESC LIMIT 1", (saved_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else []
+
+
+def executar_atualizacao(service, saved, max_workers, origem):
+    """Busca de novo as páginas de uma busca salva (sem cache) e separa os perfis novos; retorna o job"""
+    job = SearchJob(saved['payload'], saved['end_page'], max_workers, send_known=True, fresh=True, saved_id=saved['id'])
+    job.trace = service.metrics.start_trace(f"{origem} · {', '.join(saved['payload']['executive_terms'])}")
+    service.run_job(job)
+    service.metrics.finish_trace(job.trace, status=job.status, leads=len(job.leads), pages=job.pages_total)
+    return job
+
+
+class SavedSearchScheduler:
+    """Thread que executa as atualizações agendadas das buscas salvas enquanto o processo estiver no ar."""
+
+    def __init__(self, store, service, max_workers, poll_seconds=SAVED_SEARCH_POLL_SECONDS):
+        self.store = store
+        self.service = service
+        self.max_workers = max_workers
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        threading.Thread(target=self._loop, daemon=True, name="buscas-salvas").start()
+
+    def run_due(self):
+        """Executa as atualizações vencidas; retorna os jobs executados"""
+        jobs = []
+        for saved in self.store.claim_due():
+            try:
+                jobs.append(executar_atualizacao(self.service, saved, self.max_workers, "Agendada"))
+            except Exception:
+                # Uma busca com erro não impede as demais; ela volta a rodar no próximo horário
+                logger.exception("falha ao atualizar a busca salva %s", saved['id'])
+        return jobs
+
+    def _loop(self):
+        while not self._stop.wait(self.poll_seconds):
+            self.run_due()
+
+    def stop(self):
+        self._stop.set()
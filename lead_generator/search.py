@@ -0,0 +1,296 @@
+"""Execução das buscas no N8N: cache, chamada ao webhook, desembrulho e mescla dos leads.
+
+Usado pelo dashboard (em threads de segundo plano) e pela CLI, sem depender do Streamlit.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from .cache import ResponseCache
+from .config import KNOWN_PROFILES_FIELD, STREAM_CHUNK_BYTES, STREAM_FLUSH_SECONDS, STREAM_RESPONSES
+from .core import contar_potencial_leads, extrair_leads, mesclar_leads, montar_payload
+from .streaming import ler_leads
+
+
+class BuscaCancelada(Exception):
+    """A busca foi interrompida antes de enviar a requisição ao N8N."""
+
+
+class SearchService:
+    """Busca páginas de leads no webhook do N8N usando o cache, a base de leads e as métricas do processo.
+
+    Com `results` (SharedResults), páginas e buscas inteiras ficam compartilhadas entre sessões e
+    requisições idênticas simultâneas são feitas uma vez só. Com `saved` (SavedSearchStore), jobs de
+    atualização de buscas salvas registram quais perfis ainda não tinham sido vistos. Com `analytics`
+    (AnalyticsStore), toda busca concluída entra no histórico persistente. Com streaming (`stream`, por
+    chamada ou job; o padrão do processo é STREAM_RESPONSES), as respostas são lidas em blocos e os
+    leads de cada página chegam aos jobs conforme o N8N os envia.
+    """
+
+    def __init__(self, webhook_url, client, cache, store, metrics, results=None, saved=None, analytics=None):
+        self.webhook_url = webhook_url
+        self.client = client
+        self.cache = cache
+        self.store = store
+        self.metrics = metrics
+        self.results = results
+        self.saved = saved
+        self.analytics = analytics
+        self.stream = STREAM_RESPONSES
+
+    def fetch(self, payload, send_known=False, rate_limiter=None, trace=None, use_cache=True, on_leads=None,
+              max_age=None, stream=None):
+        """Busca a resposta do N8N para um payload (cache primeiro). Retorna (result_data, veio_do_cache)
+
+        Com use_cache=False o N8N é sempre consultado, mas a resposta nova ainda vai para o cache.
+        `max_age` (segundos) limita a idade das respostas em cache aceitas; `stream=None` usa o padrão do serviço.
+        Em streaming, cada lote de leads vai para on_leads(lote) assim que chega e result_data
+        é {'leads': [...]} (o mesmo formato que vai para o cache).
+        """
+        metrics = self.metrics
+        if self.cache is not None and use_cache:
+            with metrics.span(trace, 'cache'):
+                result_data = self.cache.get(payload, max_age, self.webhook_url)
+            if result_data is not None:
+                metrics.count(trace, 'cache_hits')
+                return result_data, True
+            metrics.count(trace, 'cache_misses')
+
+        # Só requisições que vão de fato ao N8N consomem o limite de taxa
+        if rate_limiter is not None and not rate_limiter():
+            raise BuscaCancelada()
+
+        # Perfis já conhecidos vão no payload para o N8N não analisá-los de novo
+        # (fica fora da chave do cache, que continua sendo o payload original)
+        request_payload = payload
+        if send_known:
+            known_profiles = self.store.known_profiles_payload()
+            if known_profiles:
+                request_payload = {**payload, KNOWN_PROFILES_FIELD: known_profiles}
+
+        # Chamada para o N8N
+        requested = time.perf_counter()
+        if stream is None:
+            stream = self.stream
+        with metrics.span(trace, 'network'):
+            response = self.client.post_json(self.webhook_url, request_payload, stream=stream,
+                                             shape=(payload['num_results'], payload['sector']))
+        metrics.count(trace, 'retries', response.attempts - 1)
+        metrics.count(trace, 'bytes_sent', len(response.request.body or b''))
+        if not stream:
+            metrics.count(trace, 'bytes_received', len(response.content))
+        if response.status_code != 200:
+            response.close()
+            raise requests.exceptions.HTTPError(f"Erro na requisição: {response.status_code}", response=response)
+
+        # Parse da resposta
+        if stream:
+            result_data = self._read_stream(response, on_leads, trace, requested)
+        else:
+            with metrics.span(trace, 'json'):
+                result_data = response.json()
+        if self.cache is not None:
+            with metrics.span(trace, 'cache'):
+                self.cache.set(payload, result_data, self.webhook_url)
+        return result_data, False
+
+    def _read_stream(self, response, on_leads, trace, requested):
+        """Lê o corpo em blocos e repassa os leads conforme chegam; retorna {'leads': [...]}
+
+        O primeiro lead sai na hora; os seguintes são agrupados a cada STREAM_FLUSH_SECONDS, para não
+        gravar na base de leads (e disputar o lock dela com o dashboard) a cada linha recebida.
+        """
+        metrics = self.metrics
+        leads = []
+        pending = []
+        received = 0
+        waiting = 0.0  # tempo fora do callback: download + parse
+        flushed_at = 0.0
+
+        def chunks():
+            nonlocal received
+            for chunk in response.iter_content(STREAM_CHUNK_BYTES):
+                received += len(chunk)
+                yield chunk
+
+        try:
+            started = time.perf_counter()
+            for batch in ler_leads(chunks(), response.headers.get('Content-Type')):
+                now = time.perf_counter()
+                waiting += now - started
+                if not leads and trace is not None:
+                    metrics.add_time(trace, 'first_lead', now - requested)
+                leads.extend(batch)
+                pending.extend(batch)
+                if on_leads is not None and now - flushed_at >= STREAM_FLUSH_SECONDS:
+                    on_leads(pending)
+                    pending, flushed_at = [], now
+                started = time.perf_counter()
+            waiting += time.perf_counter() - started
+            if on_leads is not None and pending:
+                on_leads(pending)
+        except ValueError as e:
+            raise requests.exceptions.InvalidJSONError(f"Resposta inválida do N8N: {e}", response=response) from e
+        finally:
+            response.close()
+        if trace is not None:
+            metrics.add_time(trace, 'json', waiting)
+        metrics.count(trace, 'bytes_received', received)
+        return {'leads': leads}
+
+    def page_leads(self, result_data, trace=None):
+        """Leads de uma resposta, já registrados na base de leads"""
+        with self.metrics.span(trace, 'unwrap'):
+            leads = extrair_leads(result_data)
+        with self.metrics.span(trace, 'store'):
+            return self.store.merge(leads)
+
+    def cached_leads(self, payload, end_page):
+        """Leads das páginas que já estão no cache de respostas, sem ir ao N8N"""
+        leads = []
+        vistos = set()
+        if self.cache is None:
+            return leads
+        for page in range(payload['start_page'], end_page + 1):
+            result_data = self.cache.get({**payload, "start_page": page}, url=self.webhook_url)
+            if result_data is not None:
+                mesclar_leads(leads, extrair_leads(result_data), vistos)
+        return leads
+
+    def fetch_page(self, payload, send_known=False, rate_limiter=None, trace=None, fresh=False, on_leads=None,
+                   max_age=None, stream=None):
+        """Leads de uma página; com resultados compartilhados, a mesma página pedida ao mesmo tempo vira uma requisição
+
+        Com fresh=True a página é buscada de novo no N8N e substitui a versão compartilhada. Em
+        streaming, on_leads(lote) recebe os leads (já registrados na base) conforme chegam.
+        """
+        def carregar():
+            streamed = []
+
+            def receber(batch):
+                with self.metrics.span(trace, 'store'):
+                    batch = self.store.merge(batch)
+                streamed.extend(batch)
+                if on_leads is not None:
+                    on_leads(batch)
+
+            result_data, _ = self.fetch(payload, send_known, rate_limiter, trace, use_cache=not fresh, on_leads=receber,
+                                        max_age=max_age, stream=stream)
+            return streamed if streamed else self.page_leads(result_data, trace)
+
+        if self.results is None:
+            return carregar()
+        key = ('page', ResponseCache.make_key(payload, self.webhook_url))
+        if fresh:
+            return self.results.publish(key, carregar()).leads
+        entry, origem = self.results.load(key, carregar, max_age)
+        if origem != 'loaded':
+            self.metrics.count(trace, 'shared_hits' if origem == 'hit' else 'coalesced')
+        return entry.leads
+
+    def record(self, payload, end_page, leads):
+        """Registra uma busca concluída no histórico persistente"""
+        if self.analytics is not None:
+            self.analytics.record({**payload, "end_page": end_page}, len(leads), contar_potencial_leads(leads))
+
+    def result_key(self, payload, end_page):
+        return ('search', ResponseCache.make_key({**payload, "end_page": end_page}, self.webhook_url))
+
+    def run_job(self, job):
+        """Executa um job de busca: baixa as páginas em paralelo e junta os leads conforme chegam"""
+        job.set_status('running')
+        key = self.result_key(job.payload, job.end_page)
+        if self.results is not None and not job.fresh:
+            # Mesma busca já concluída por outra sessão: só a referência ao resultado
+            job.result = self.results.get(key, job.max_age)
+            if job.result is not None:
+                self.metrics.count(job.trace, 'shared_hits')
+                job.leads = job.result.leads
+                job.pages_done = job.pages_total
+                job.set_status('done')
+                self.record(job.payload, job.end_page, job.leads)
+                return
+
+        pages = range(job.payload['start_page'], job.end_page + 1)
+        vistos = set()
+        lock = threading.Lock()  # páginas em streaming juntam leads de várias threads
+        streamed_pages = set()
+        leads_por_pagina = {}
+
+        def receber(page):
+            def juntar(batch):
+                with lock:
+                    streamed_pages.add(page)
+                    if not job.cancel_event.is_set():
+                        mesclar_leads(job.leads, batch, vistos)
+            return juntar
+
+        executor = ThreadPoolExecutor(max_workers=job.max_workers)
+        try:
+            futures = {
+                executor.submit(self.fetch_page, {**job.payload, "start_page": page}, job.send_known, None, job.trace,
+                                job.fresh, receber(page), job.max_age, job.stream): page
+                for page in pages
+            }
+            for future in as_completed(futures):
+                if job.cancel_event.is_set():
+                    return
+                page = futures[future]
+                try:
+                    page_leads = future.result()
+                except requests.exceptions.HTTPError as e:
+                    job.errors.append(f"Página {page}: {str(e)}")
+                except requests.exceptions.RequestException as e:
+                    job.errors.append(f"Página {page}: Erro de conexão: {str(e)}")
+                else:
+                    job.set_status('parsing')
+                    leads_por_pagina[page] = page_leads
+                    with lock:
+                        # Páginas em streaming já entraram lote a lote
+                        if page not in streamed_pages:
+                            mesclar_leads(job.leads, page_leads, vistos)
+                    job.set_status('running')
+                job.pages_done += 1
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        # As páginas entram conforme terminam; o resultado final segue a ordem das páginas (e dos leads em cada uma),
+        # para que a mesma busca produza sempre a mesma saída
+        with lock:
+            job.leads = []
+            vistos = set()
+            for page in pages:
+                mesclar_leads(job.leads, leads_por_pagina.get(page, ()), vistos)
+
+        # Só buscas completas são compartilhadas; sessões com a mesma busca passam a apontar para o mesmo resultado
+        if self.results is not None and not job.errors and not job.cancel_event.is_set():
+            job.result = self.results.publish(key, job.leads)
+            job.leads = job.result.leads
+
+        # Atualização de busca salva: separa os perfis que ela ainda não tinha visto
+        if self.saved is not None and job.saved_id is not None and len(job.errors) < job.pages_total:
+            job.new_leads = self.saved.record_run(job.saved_id, job.leads)
+        job.set_status('failed' if len(job.errors) == job.pages_total else 'done')
+        if job.status == 'done':
+            self.record(job.payload, job.end_page, job.leads)
+
+    def run_campaign_item(self, item, num_results, bucket, stop_event, send_known=True):
+        """Executa um item de campanha respeitando o limite de taxa. Retorna (payload, leads)"""
+        payload = montar_payload(item['executive_terms'], item['sector'], item['location'],
+                                 num_results, item['start_page'])
+        metrics = self.metrics
+        trace = metrics.start_trace(f"Campanha · {', '.join(item['executive_terms'])} · {item['location']}")
+        leads = []
+        vistos = set()
+        for page in range(item['start_page'], item['end_page'] + 1):
+            page_leads = self.fetch_page(
+                {**payload, "start_page": page}, send_known=send_known,
+                rate_limiter=lambda: bucket.acquire(stop_event), trace=trace
+            )
+            mesclar_leads(leads, page_leads, vistos)
+        metrics.finish_trace(trace, status='done', leads=len(leads), pages=item['end_page'] - item['start_page'] + 1)
+        self.record(payload, item['end_page'], leads)
+        return {**payload, "end_page": item['end_page']}, leads
@@ -0,0 +1,134 @@
+"""Arquivo em disco de uma sessão: histórico antigo e leads que saíram da memória, lidos de volta sob demanda."""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from .config import SESSION_RETENTION_SECONDS
+
+
+class SpillStore:
+    """SQLite por sessão com o excedente do orçamento de memória (histórico e leads)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS history (seq INTEGER PRIMARY KEY, data TEXT)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS leads (pos INTEGER PRIMARY KEY, data TEXT)")
+        self._conn.commit()
+
+    @staticmethod
+    def prune(directory, max_age=SESSION_RETENTION_SECONDS):
+        """Remove arquivos de sessões que não são tocados há mais de `max_age` segundos"""
+        if not os.path.isdir(directory):
+            return
+        limit = time.time() - max_age
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                if os.path.getmtime(path) < limit:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    # Histórico
+
+    def append_history(self, seq, row):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO history (seq, data) VALUES (?, ?)",
+                               (seq, json.dumps(row, ensure_ascii=False)))
+            self._conn.commit()
+
+    def history(self, first, last):
+        """Entradas com seq em [first, last), da mais nova para a mais antiga"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM history WHERE seq >= ? AND seq < ? ORDER BY seq DESC", (first, last)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def iter_history(self, until=None, chunk=1000):
+        """Entradas em disco com seq < `until` (todas, se None), da mais antiga para a mais nova"""
+        last_seq = -1
+        until = float('inf') if until is None else until
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT seq, data FROM history WHERE seq > ? AND seq < ? ORDER BY seq LIMIT ?",
+                    (last_seq, until, chunk)
+                ).fetchall()
+            if not rows:
+                return
+            for seq, data in rows:
+                yield json.loads(data)
+            last_seq = rows[-1][0]
+
+    def clear_history(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM history")
+            self._conn.commit()
+
+    # Leads
+
+    def write_leads(self, leads):
+        """Substitui os leads em disco; a posição de cada lead é a da tabela da sessão"""
+        with self._lock:
+            self._conn.execute("DELETE FROM leads")
+            self._conn.executemany(
+                "INSERT INTO leads (pos, data) VALUES (?, ?)",
+                ((pos, json.dumps(lead, ensure_ascii=False, default=str)) for pos, lead in enumerate(leads))
+            )
+            self._conn.commit()
+
+    def read_leads(self, positions):
+        """Leads nas posições pedidas, na mesma ordem"""
+        positions = [int(p) for p in positions]
+        found = {}
+        with self._lock:
+            # Em blocos, abaixo do limite de parâmetros do SQLite
+            for i in range(0, len(positions), 500):
+                block = positions[i:i + 500]
+                marks = ",".join("?" * len(block))
+                for pos, data in self._conn.execute(f"SELECT pos, data FROM leads WHERE pos IN ({marks})", block):
+                    found[pos] = json.loads(data)
+        return [found[p] for p in positions if p in found]
+
+    def iter_leads(self, chunk=1000):
+        last_pos = -1
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT pos, data FROM leads WHERE pos > ? ORDER BY pos LIMIT ?", (last_pos, chunk)
+                ).fetchall()
+            if not rows:
+                return
+            for pos, data in rows:
+                yield json.loads(data)
+            last_pos = rows[-1][0]
+
+
+class SpilledLeads:
+    """Sequência somente leitura dos leads de uma sessão que estão em disco (len, índice, fatia e iteração)."""
+
+    def __init__(self, spill, size):
+        self.spill = spill
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return self.spill.iter_leads()
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self.spill.read_leads(range(*item.indices(self.size)))
+        if item < 0:
+            item += self.size
+        if not 0 <= item < self.size:
+            raise IndexError(item)
+        return self.spill.read_leads([item])[0]
@@ -0,0 +1,124 @@
+"""Base persistente de leads e filtro de Bloom dos perfis conhecidos."""
+
+import base64
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from .config import BLOOM_ERROR_RATE, BLOOM_MIN_CAPACITY
+from .core import hash_perfil
+
+
+class BloomFilter:
+    """Filtro de Bloom dos perfis conhecidos, enviado ao N8N para pular perfis já analisados.
+
+    Posições de cada perfil: (h1 + i * h2) % m para i em 0..k-1, onde h1 e h2 são os
+    bytes 0-7 e 8-15 (big-endian) do SHA-256 da URL normalizada, com h2 forçado a ímpar.
+    """
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        self.capacity = max(capacity, BLOOM_MIN_CAPACITY)
+        self.m = math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.k = max(1, round(self.m / self.capacity * math.log(2)))
+        self.bits = bytearray((self.m + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key_hex):
+        digest = bytes.fromhex(key_hex)
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        return ((h1 + i * h2) % self.m for i in range(self.k))
+
+    def add(self, key_hex):
+        for pos in self._positions(key_hex):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key_hex):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key_hex))
+
+    def to_payload(self):
+        return {
+            "format": "bloom-sha256",
+            "m": self.m,
+            "k": self.k,
+            "count": self.count,
+            "bits": base64.b64encode(bytes(self.bits)).decode('ascii'),
+        }
+
+
+class LeadStore:
+    """Base persistente de leads (SQLite), chaveada pelo hash da URL normalizada do perfil."""
+
+    def __init__(self, db_path):
+        self.stats = {'new': 0, 'known': 0, 'analise_reused': 0}
+        self._lock = threading.Lock()
+        self._bloom = None
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leads ("
+            " url_hash TEXT PRIMARY KEY, link TEXT, data TEXT,"
+            " first_seen REAL, last_seen REAL, times_seen INTEGER)"
+        )
+        self._conn.commit()
+
+    def merge(self, leads):
+        """Grava os leads na base e completa a análise dos perfis que o N8N devolveu sem reanalisar"""
+        now = time.time()
+        merged = []
+        with self._lock:
+            for lead in leads:
+                key = hash_perfil(lead.get('link'))
+                if key is None:
+                    merged.append(lead)
+                    continue
+
+                row = self._conn.execute("SELECT data FROM leads WHERE url_hash = ?", (key,)).fetchone()
+                if row is None:
+                    self._conn.execute(
+                        "INSERT INTO leads (url_hash, link, data, first_seen, last_seen, times_seen) VALUES (?, ?, ?, ?, ?, 1)",
+                        (key, lead.get('link'), json.dumps(lead, ensure_ascii=False), now, now)
+                    )
+                    if self._bloom is not None:
+                        self._bloom.add(key)
+                    self.stats['new'] += 1
+                else:
+                    stored = json.loads(row[0])
+                    if not lead.get('analise') and stored.get('analise'):
+                        self.stats['analise_reused'] += 1
+                    lead = {**stored, **{k: v for k, v in lead.items() if v not in (None, '')}}
+                    self._conn.execute(
+                        "UPDATE leads SET data = ?, last_seen = ?, times_seen = times_seen + 1 WHERE url_hash = ?",
+                        (json.dumps(lead, ensure_ascii=False), now, key)
+                    )
+                    self.stats['known'] += 1
+                merged.append(lead)
+            self._conn.commit()
+        return merged
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+
+    def all_leads(self):
+        """Todos os leads da base, do mais recente para o mais antigo"""
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM leads ORDER BY last_seen DESC").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def known_profiles_payload(self):
+        """Filtro de Bloom dos perfis conhecidos para o payload do N8N (None se a base estiver vazia)"""
+        with self._lock:
+            if self._bloom is None or self._bloom.count > self._bloom.capacity:
+                keys = [row[0] for row in self._conn.execute("SELECT url_hash FROM leads")]
+                self._bloom = BloomFilter(2 * len(keys))
+                for key in keys:
+                    self._bloom.add(key)
+            if not self._bloom.count:
+                return None
+            return self._bloom.to_payload()
@@ -0,0 +1,205 @@
+"""Leitura incremental das respostas do webhook: os leads saem conforme o corpo chega.
+
+Aceita NDJSON (um lead por linha) e o JSON agregado de sempre ({"leads": [...]},
+{"leads": {"data": [...]}} ou {"leads": {...}}), lido em blocos sem montar o corpo inteiro.
+"""
+
+import codecs
+import json
+
+from .core import extrair_leads
+
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl', 'application/json-seq')
+_WHITESPACE = ' \t\r\n'
+_DELIMITERS = _WHITESPACE + ',]}'
+
+
+class NdjsonLeadParser:
+    """Um lead por linha; linhas no formato agregado ({"leads": ...}) também são aceitas."""
+
+    def __init__(self):
+        self._buffer = ''
+
+    def feed(self, text):
+        """Leads das linhas completadas por este bloco de texto"""
+        if '\n' not in text:
+            self._buffer += text
+            return []
+        *lines, self._buffer = (self._buffer + text).split('\n')
+        return self._leads(lines)
+
+    def close(self):
+        lines, self._buffer = [self._buffer], ''
+        return self._leads(lines)
+
+    @staticmethod
+    def _leads(lines):
+        leads = []
+        for line in lines:
+            line = line.strip().lstrip('\x1e')  # json-seq prefixa cada registro com RS
+            if not line:
+                continue
+            item = json.loads(line)
+            leads.extend(extrair_leads(item) if isinstance(item, dict) and 'leads' in item else [item])
+        return leads
+
+
+class JsonLeadParser:
+    """Parser incremental do JSON agregado: cada elemento da lista de leads sai assim que termina de chegar.
+
+    Segue as mesmas regras de extrair_leads; o que vem depois da lista de leads é ignorado.
+    O parser é um gerador que pede mais texto (yield) sempre que o buffer acaba no meio de um valor.
+    """
+
+    def __init__(self):
+        self._buffer = ''
+        self._pos = 0
+        self._closed = False
+        self._leads = []
+        self._decoder = json.JSONDecoder()
+        self._parser = self._parse()
+        self.done = False
+
+    def feed(self, text):
+        """Leads completados por este bloco de texto"""
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        return self._resume()
+
+    def close(self):
+        self._closed = True
+        leads = self._resume()
+        if not self.done:
+            raise ValueError("resposta JSON incompleta")
+        return leads
+
+    def _resume(self):
+        if not self.done:
+            try:
+                next(self._parser)
+            except StopIteration:
+                self.done = True
+                self._buffer, self._pos = '', 0
+        leads, self._leads = self._leads, []
+        return leads
+
+    # Leitura do buffer (geradores: `yield` = esperar o próximo bloco)
+
+    def _peek(self):
+        """Próximo caractere que não é espaço, sem consumi-lo"""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if self._closed:
+                raise ValueError("resposta JSON incompleta")
+            yield
+
+    def _value(self):
+        """Um valor JSON completo"""
+        yield from self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._closed:
+                    raise
+                yield
+                continue
+            # Um número ou literal só termina num delimitador: "1." ou "12" podem continuar no próximo bloco
+            if not isinstance(value, (dict, list, str)) and not self._closed and (
+                    end == len(self._buffer) or self._buffer[end] not in _DELIMITERS):
+                yield
+                continue
+            self._pos = end
+            return value
+
+    def _key(self):
+        """Próxima chave do objeto atual, ou None no fim do objeto"""
+        char = yield from self._peek()
+        if char == ',':
+            self._pos += 1
+            char = yield from self._peek()
+        if char == '}':
+            self._pos += 1
+            return None
+        key = yield from self._value()
+        char = yield from self._peek()
+        if char != ':':
+            raise ValueError(f"JSON inválido na posição {self._pos}")
+        self._pos += 1
+        return key
+
+    def _array(self):
+        self._pos += 1  # '['
+        while True:
+            char = yield from self._peek()
+            if char == ']':
+                self._pos += 1
+                return
+            if char == ',':
+                self._pos += 1
+                continue
+            lead = yield from self._value()
+            self._leads.append(lead)  # depois do yield: self._leads é trocada a cada bloco
+
+    def _parse(self):
+        char = yield from self._peek()
+        if char != '{':
+            value = yield from self._value()
+            self._leads.extend(extrair_leads(value) if isinstance(value, dict) else [])
+            return
+        self._pos += 1
+        while True:
+            key = yield from self._key()
+            if key is None:
+                return
+            if key == 'leads':
+                yield from self._leads_value()
+                return
+            yield from self._value()
+
+    def _leads_value(self):
+        char = yield from self._peek()
+        if char == '[':
+            yield from self._array()
+        elif char == '{':
+            # {"data": [...]} ou um lead só; só dá para saber ao encontrar (ou não) a chave 'data'
+            self._pos += 1
+            lead = {}
+            while True:
+                key = yield from self._key()
+                if key is None:
+                    self._leads.append(lead)
+                    return
+                if key == 'data':
+                    if (yield from self._peek()) == '[':
+                        yield from self._array()
+                    else:
+                        data = yield from self._value()
+                        self._leads.extend(data if isinstance(data, list) else [data])
+                    return
+                lead[key] = yield from self._value()
+        else:
+            lead = yield from self._value()
+            self._leads.append(lead)
+
+
+def parser_para(content_type):
+    """Parser adequado ao Content-Type da resposta"""
+    media_type = (content_type or '').split(';')[0].strip().lower()
+    return NdjsonLeadParser() if media_type in NDJSON_CONTENT_TYPES else JsonLeadParser()
+
+
+def ler_leads(chunks, content_type):
+    """Gera listas de leads conforme os blocos de bytes (`chunks`) chegam"""
+    parser = parser_para(content_type)
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for chunk in chunks:
+        leads = parser.feed(decoder.decode(chunk))
+        if leads:
+            yield leads
+    leads = parser.feed(decoder.decode(b'', final=True)) + parser.close()
+    if leads:
+        yield leads
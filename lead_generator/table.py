@@ -0,0 +1,61 @@
+"""Tabela colunar (pandas) dos leads, com o potencial classificado na ingestão.
+
+O pandas só é importado quando a primeira tabela é montada.
+"""
+
+import sys
+
+from .core import POTENCIAIS, classificar_potencial
+
+LEAD_TEXT_COLUMNS = ['titulo', 'link', 'resumo', 'analise']
+LEAD_SEARCH_COLUMNS = ['titulo', 'resumo', 'analise']
+
+
+def montar_tabela_leads(leads):
+    """Converte os leads em uma tabela colunar com o potencial já classificado"""
+    import pandas as pd
+    df = pd.DataFrame(leads)
+    for col in LEAD_TEXT_COLUMNS:
+        if col not in df.columns:
+            df[col] = ''
+    df[LEAD_TEXT_COLUMNS] = df[LEAD_TEXT_COLUMNS].fillna('').astype(str)
+    df['potencial'] = pd.Categorical(df['analise'].map(classificar_potencial), categories=POTENCIAIS)
+    return df
+
+
+def contar_potencial(df):
+    """Contagem de leads por potencial, a partir da coluna categórica"""
+    counts = df['potencial'].value_counts()
+    return {potencial: int(counts.get(potencial, 0)) for potencial in POTENCIAIS}
+
+
+def anexar_tabela_leads(table, leads):
+    """Tabela com os leads novos anexados ao fim (o potencial continua categórico)"""
+    import pandas as pd
+    novos = montar_tabela_leads(leads)
+    table = pd.concat([table, novos], ignore_index=True)
+    table['potencial'] = pd.Categorical(table['potencial'], categories=POTENCIAIS)
+    return table, novos
+
+
+def memoria_leads(leads, amostra=200):
+    """Bytes aproximados da lista de leads (dicts), estimados por uma amostra espaçada de `amostra` leads"""
+    if not leads:
+        return 0
+    passo = max(1, len(leads) // amostra)
+    medidos = [leads[i] for i in range(0, len(leads), passo)]
+    por_lead = sum(sys.getsizeof(lead) + sum(sys.getsizeof(v) for v in lead.values()) for lead in medidos) / len(medidos)
+    return int(sys.getsizeof(leads) + por_lead * len(leads))
+
+
+def registro_da_tabela(lead, potencial):
+    """Lead no formato de uma linha da tabela (textos vazios no lugar de ausentes), sem montar a tabela"""
+    record = {col: '' if lead.get(col) is None else str(lead.get(col)) for col in LEAD_TEXT_COLUMNS}
+    record['potencial'] = potencial
+    return record
+
+
+def tabela_de_registros(rows):
+    """DataFrame a partir de uma lista de dicts (exportação do histórico)"""
+    import pandas as pd
+    return pd.DataFrame(rows)
@@ -0,0 +1,133 @@
+"""Agregados de analytics mantidos a cada busca comparados com o recálculo a partir das buscas registradas."""
+
+import random
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import pytest
+
+from lead_generator.analytics import AnalyticsStore
+
+TERMS = ['CEO', 'CMO', 'CTO', 'Diretor']
+LOCATIONS = ['São Paulo', 'Recife', 'Curitiba']
+SECTORS = ['Todos os setores', 'Tecnologia/SaaS', 'Saúde']
+DAY = 24 * 60 * 60
+
+
+def gerar_buscas(n, seed=0):
+    rng = random.Random(seed)
+    now = time.time()
+    searches = []
+    for _ in range(n):
+        results = rng.randint(0, 30)
+        alto = rng.randint(0, results)
+        medio = rng.randint(0, results - alto)
+        terms = rng.sample(TERMS, rng.randint(1, 3))
+        if rng.random() < 0.2:
+            terms = terms + [terms[0], ' ']  # termos repetidos e vazios contam uma vez só
+        searches.append({
+            'payload': {'location': rng.choice(LOCATIONS), 'sector': rng.choice(SECTORS), 'executive_terms': terms,
+                        'num_results': 10, 'start_page': 0, 'end_page': rng.randint(0, 3)},
+            'results_count': results,
+            'counts': {'ALTO': alto, 'MÉDIO': medio, 'BAIXO': results - alto - medio},
+            'timestamp': now - rng.uniform(0, 60) * DAY,
+        })
+    return searches
+
+
+def recalcular(searches, dimension, days=None):
+    """Números por valor da dimensão calculados direto das buscas"""
+    first_day = None
+    if days is not None:
+        first_day = datetime.fromtimestamp(time.time() - (days - 1) * DAY).strftime("%Y-%m-%d")
+    cells = defaultdict(lambda: {'searches': 0, 'leads': 0, 'alto': 0, 'conversion_sum': 0.0})
+    for search in searches:
+        if first_day and datetime.fromtimestamp(search['timestamp']).strftime("%Y-%m-%d") < first_day:
+            continue
+        payload = search['payload']
+        terms = list(dict.fromkeys(t.strip() for t in payload['executive_terms'] if t.strip()))
+        values = {
+            'total': [''],
+            'location': [payload['location']],
+            'sector': [payload['sector']],
+            'term': terms,
+            'term_location': [f"{term}\t{payload['location']}" for term in terms],
+        }[dimension]
+        rate = round(search['counts']['ALTO'] / search['results_count'] * 100, 1) if search['results_count'] else 0
+        for value in values:
+            cell = cells[value]
+            cell['searches'] += 1
+            cell['leads'] += search['results_count']
+            cell['alto'] += search['counts']['ALTO']
+            cell['conversion_sum'] += rate
+    return cells
+
+
+@pytest.fixture(scope='module')
+def analytics(tmp_path_factory):
+    store = AnalyticsStore(str(tmp_path_factory.mktemp("analytics") / "analytics.sqlite3"))
+    searches = gerar_buscas(300)
+    for search in searches:
+        store.record(search['payload'], search['results_count'], search['counts'], search['timestamp'])
+    return store, searches
+
+
+@pytest.mark.parametrize('days', [None, 1, 7, 30])
+def test_resumo_igual_ao_recalculo(analytics, days):
+    store, searches = analytics
+    expected = recalcular(searches, 'total', days).get('', {'searches': 0, 'leads': 0, 'alto': 0, 'conversion_sum': 0})
+    summary = store.summary(days)
+    assert summary['searches'] == expected['searches']
+    assert summary['leads'] == expected['leads']
+    assert summary['alto_potencial'] == expected['alto']
+    if expected['searches']:
+        assert summary['conversion_rate'] == round(expected['conversion_sum'] / expected['searches'], 1)
+
+
+@pytest.mark.parametrize('dimension', ['location', 'sector', 'term', 'term_location'])
+@pytest.mark.parametrize('days', [None, 7])
+def test_quebras_iguais_ao_recalculo(analytics, dimension, days):
+    store, searches = analytics
+    expected = recalcular(searches, dimension, days)
+    rows = store.breakdown(dimension, days)
+    assert {row['value']: (row['searches'], row['leads'], row['alto_potencial']) for row in rows} == {
+        value: (cell['searches'], cell['leads'], cell['alto']) for value, cell in expected.items()
+    }
+    assert [row['searches'] for row in rows] == sorted((row['searches'] for row in rows), reverse=True)
+
+
+def test_melhores_combinacoes_iguais_ao_recalculo(analytics):
+    store, searches = analytics
+    expected = recalcular(searches, 'term_location')
+    top = store.top_cells(limit=5, min_searches=3)
+    rates = sorted((round(cell['conversion_sum'] / cell['searches'], 1)
+                    for cell in expected.values() if cell['searches'] >= 3), reverse=True)
+    assert [cell['conversion_rate'] for cell in top] == rates[:5]
+    for cell in top:
+        assert cell['searches'] == expected[f"{cell['term']}\t{cell['location']}"]['searches']
+
+
+def test_tendencia_diaria_e_mensal_somam_o_total(analytics):
+    store, searches = analytics
+    daily = store.conversion_trend('day', limit=1000)
+    monthly = store.conversion_trend('month', limit=1000)
+    assert sum(day['searches'] for day in daily) == len(searches)
+    assert sum(month['searches'] for month in monthly) == len(searches)
+    assert [day['period'] for day in daily] == sorted(day['period'] for day in daily)
+    assert len(store.conversion_trend('day', limit=3)) == 3
+
+
+def test_dimensao_e_granularidade_invalidas(analytics):
+    store, _ = analytics
+    with pytest.raises(ValueError):
+        store.breakdown('cidade')
+    with pytest.raises(ValueError):
+        store.conversion_trend('week')
+
+
+def test_persiste_entre_instancias(tmp_path):
+    path = str(tmp_path / "analytics.sqlite3")
+    search = gerar_buscas(1)[0]
+    AnalyticsStore(path).record(search['payload'], search['results_count'], search['counts'])
+    assert len(AnalyticsStore(path)) == 1
@@ -0,0 +1,190 @@
+"""Campanhas: checkpoint, retomada sem itens em dobro e limites de taxa compartilhados."""
+
+import json
+import threading
+import time
+
+from lead_generator.campaigns import CampaignRunner, TokenBucket
+from lead_generator.search import BuscaCancelada
+
+
+def itens(n):
+    return [{'executive_terms': ['CEO'], 'sector': 'Todos os setores', 'location': f"L{i}",
+             'start_page': 0, 'end_page': 0} for i in range(n)]
+
+
+class Worker:
+    """Worker de campanha falso: registra as chamadas e pode segurar cada item até ser liberado"""
+
+    def __init__(self, hold=False, fail=()):
+        self.calls = []
+        self.send_known = []
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.hold = hold
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def __call__(self, item, num_results, bucket, stop_event, send_known=True):
+        if not bucket.acquire(stop_event):
+            raise BuscaCancelada()
+        with self._lock:
+            self.calls.append(item['location'])
+            self.send_known.append(send_known)
+        self.started.set()
+        if self.hold:
+            self.release.wait(5)
+        if item['location'] in self.fail:
+            raise RuntimeError("falhou")
+        return {'location': item['location']}, [{'link': item['location']}]
+
+
+def esperar(campaign):
+    campaign.thread.join(5)
+    assert not campaign.thread.is_alive()
+
+
+def checkpoint(campaign):
+    with open(campaign.path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_executa_todos_os_itens_e_grava_o_checkpoint(tmp_path):
+    worker = Worker(fail={'L2'})
+    runner = CampaignRunner(str(tmp_path), worker)
+    campaign = runner.create(itens(4), 10, 6000, 2, send_known=False)
+    esperar(campaign)
+
+    assert sorted(worker.calls) == ['L0', 'L1', 'L2', 'L3']
+    assert set(worker.send_known) == {False}
+    data = checkpoint(campaign)
+    assert data['status'] == 'done'
+    assert [item['status'] for item in data['items']] == ['done', 'done', 'failed', 'done']
+    assert data['items'][0]['results_count'] == 1 and data['items'][2]['error'] == "falhou"
+
+
+def test_parar_e_retomar_nao_repete_o_item_em_andamento(tmp_path):
+    worker = Worker(hold=True)
+    runner = CampaignRunner(str(tmp_path), worker)
+    campaign = runner.create(itens(2), 10, 6000, 1)
+    assert worker.started.wait(5)
+
+    runner.stop(campaign.id)
+    runner.resume(campaign.id)
+    worker.release.set()
+    esperar(campaign)
+
+    assert worker.calls == ['L0', 'L1']
+    assert campaign.status == 'done' and campaign.progress()['done'] == 2
+
+
+def test_reinicio_retoma_do_checkpoint(tmp_path):
+    # Processo derrubado no meio: o item em andamento volta para a fila, os concluídos não são refeitos
+    worker = Worker(hold=True)
+    runner = CampaignRunner(str(tmp_path), worker)
+    campaign = runner.create(itens(3), 10, 6000, 1)
+    assert worker.started.wait(5)
+    data = checkpoint(campaign)
+    assert data['items'][0]['status'] == 'running'
+
+    data['items'][1].update(status='done', results_count=7)
+    with open(campaign.path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    campaign.stop_event.set()  # o processo "antigo" para de pegar itens novos
+
+    restarted = Worker()
+    reloaded = CampaignRunner(str(tmp_path), restarted).campaigns[campaign.id]
+    esperar(reloaded)
+    try:
+        assert sorted(restarted.calls) == ['L0', 'L2']
+        assert [item['status'] for item in checkpoint(reloaded)['items']] == ['done', 'done', 'done']
+    finally:
+        worker.release.set()
+
+
+def test_campanha_parada_continua_parada_ao_reiniciar(tmp_path):
+    worker = Worker(hold=True)
+    runner = CampaignRunner(str(tmp_path), worker)
+    campaign = runner.create(itens(2), 10, 6000, 1)
+    assert worker.started.wait(5)
+    runner.stop(campaign.id)
+    worker.release.set()
+    esperar(campaign)
+
+    restarted = Worker()
+    reloaded = CampaignRunner(str(tmp_path), restarted).campaigns[campaign.id]
+    assert reloaded.status == 'stopped' and reloaded.thread is None
+    assert restarted.calls == []
+
+
+def test_checkpoint_antigo_sem_send_known_envia_os_perfis(tmp_path):
+    runner = CampaignRunner(str(tmp_path), Worker())
+    campaign = runner.create(itens(1), 10, 6000, 1)
+    esperar(campaign)
+    data = checkpoint(campaign)
+    del data['send_known']
+    data['status'] = 'running'
+    data['items'][0]['status'] = 'pending'
+    with open(campaign.path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+    worker = Worker()
+    esperar(CampaignRunner(str(tmp_path), worker).campaigns[campaign.id])
+    assert worker.send_known == [True]
+
+
+def test_bucket_nao_entrega_token_depois_de_parar():
+    bucket = TokenBucket(6000, capacity=5)
+    stop_event = threading.Event()
+    stop_event.set()
+    assert bucket.acquire(stop_event) is False
+
+
+def test_bucket_respeita_o_limite_do_pai():
+    parent = TokenBucket(60, capacity=1)
+    child = TokenBucket(6000, capacity=10, parent=parent)
+    stop_event = threading.Event()
+    assert child.acquire(stop_event)
+    threading.Timer(0.1, stop_event.set).start()
+    assert child.acquire(stop_event) is False
+
+
+def test_campanhas_simultaneas_dividem_a_concorrencia(tmp_path):
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def worker(item, num_results, bucket, stop_event, send_known=True):
+        assert bucket.acquire(stop_event)
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+        return {}, []
+
+    runner = CampaignRunner(str(tmp_path), worker, max_rate_per_minute=60000, max_concurrency=2)
+    campaigns = [runner.create(itens(4), 10, 60000, 2) for _ in range(3)]
+    for campaign in campaigns:
+        esperar(campaign)
+    assert max(peak) <= 2
+    assert all(campaign.status == 'done' for campaign in campaigns)
+
+
+def test_campanhas_simultaneas_dividem_a_taxa(tmp_path):
+    stamps = []
+
+    def worker(item, num_results, bucket, stop_event, send_known=True):
+        assert bucket.acquire(stop_event)
+        stamps.append(time.monotonic())
+        return {}, []
+
+    # 20 requisições/s no webhook; cada campanha sozinha poderia fazer 100/s
+    runner = CampaignRunner(str(tmp_path), worker, max_rate_per_minute=1200, max_concurrency=1)
+    campaigns = [runner.create(itens(5), 10, 6000, 2) for _ in range(2)]
+    for campaign in campaigns:
+        esperar(campaign)
+    stamps.sort()
+    assert len(stamps) == 10
+    assert stamps[-1] - stamps[0] >= 0.4  # 9 intervalos de 50 ms, com folga
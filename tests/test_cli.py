@@ -0,0 +1,22 @@
+"""CLI: setores e localizações aceitos são os mesmos do dashboard."""
+
+import pytest
+
+from lead_generator.cli import build_parser
+from lead_generator.core import LOCALIZACOES, SETORES
+
+
+def test_aceita_as_opcoes_do_dashboard():
+    args = build_parser().parse_args(['search', '--terms', 'CEO', '--sector', SETORES[1], '--location', "São Paulo"])
+    assert (args.sector, args.location) == (SETORES[1], "São Paulo")
+
+
+def test_padroes_sao_as_primeiras_opcoes():
+    args = build_parser().parse_args(['search', '--terms', 'CEO'])
+    assert (args.sector, args.location) == (SETORES[0], LOCALIZACOES[0])
+
+
+@pytest.mark.parametrize('option, value', [('--sector', "Tecnologia/TI"), ('--location', "Lisboa")])
+def test_recusa_opcao_inexistente(option, value):
+    with pytest.raises(SystemExit):
+        build_parser().parse_args(['search', '--terms', 'CEO', option, value])
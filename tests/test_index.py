@@ -0,0 +1,26 @@
+"""Índice invertido da busca textual nos leads."""
+
+import pytest
+
+from lead_generator.index import LeadSearchIndex
+
+
+@pytest.fixture
+def index():
+    index = LeadSearchIndex()
+    index.add(0, "Márcia - CEO - Saúde+", "Potencial ALTO")
+    index.add(1, "José - CMO - Acme", "Potencial BAIXO")
+    index.add(2, "Ana - CEO - Acme", "")
+    return index
+
+
+def test_termos_sao_prefixos_sem_acento_e_combinados_com_e(index):
+    assert index.search("saude") == {0}
+    assert index.search("CE") == {0, 2}
+    assert index.search("ceo acme") == {2}
+    assert index.search("ceo inexistente") == set()
+
+
+@pytest.mark.parametrize('query', ["-", "/", "&", "  ", ""])
+def test_consulta_sem_termos_nao_filtra(index, query):
+    assert index.search(query) is None
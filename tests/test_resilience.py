@@ -0,0 +1,189 @@
+"""Prazos adaptativos, hedge e circuit breaker do webhook, e sua integração com WebhookClient.post_json."""
+
+import threading
+import time
+from unittest import mock
+
+import pytest
+import requests
+
+from lead_generator.client import WebhookClient
+from lead_generator.resilience import CircuitBreaker, CircuitOpenError, LatencyTracker
+
+URL = "http://n8n.invalid/webhook"
+
+
+def resposta(status=200):
+    response = mock.Mock(status_code=status)
+    response.close = mock.Mock()
+    return response
+
+
+def com_historico(client, shape, seconds, n=20):
+    for _ in range(n):
+        client.latency.add((shape, False), seconds)
+
+
+def abrir(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.allow()
+        breaker.failure()
+
+
+def test_abre_depois_de_falhas_seguidas_e_recusa_na_hora():
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=60)
+    abrir(breaker)
+    assert breaker.state == 'open'
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+
+def test_meio_aberto_deixa_passar_uma_requisicao_de_teste():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0)
+    abrir(breaker)
+    breaker.allow()
+    assert breaker.state == 'half_open'
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.success()
+    assert breaker.state == 'closed'
+    breaker.allow()
+
+
+def test_teste_que_falha_reabre_o_circuito():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0)
+    abrir(breaker)
+    breaker.allow()
+    breaker.failure()
+    assert breaker.state == 'open'
+
+
+def test_sucesso_zera_as_falhas():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    breaker.failure()
+    breaker.success()
+    breaker.failure()
+    assert breaker.state == 'closed'
+
+
+@pytest.mark.parametrize('error', [
+    requests.exceptions.ContentDecodingError("gzip inválido"),
+    requests.exceptions.TooManyRedirects("redirects"),
+    RuntimeError("inesperado"),
+])
+def test_erro_nao_repetivel_na_requisicao_de_teste_libera_o_circuito(error):
+    client = WebhookClient(max_retries=0)
+    client.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    with mock.patch.object(client.session, 'post', side_effect=requests.exceptions.ConnectionError()):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.post_json(URL, {})
+    assert client.breaker.state == 'open'
+
+    with mock.patch.object(client.session, 'post', side_effect=error):
+        with pytest.raises(type(error)):
+            client.post_json(URL, {})
+    assert client.breaker.state == 'open'
+    assert not client.breaker._trial_running
+
+    with mock.patch.object(client.session, 'post', return_value=resposta()):
+        assert client.post_json(URL, {}).status_code == 200
+    assert client.breaker.state == 'closed'
+
+
+def test_status_transitorio_conta_como_falha():
+    client = WebhookClient(max_retries=0)
+    client.breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    with mock.patch.object(client.session, 'post', return_value=resposta(503)):
+        client.post_json(URL, {})
+        client.post_json(URL, {})
+        with pytest.raises(CircuitOpenError):
+            client.post_json(URL, {})
+    assert client.stats['rejected'] == 1
+
+
+def test_prazo_sem_amostras_suficientes_e_o_fixo():
+    tracker = LatencyTracker(min_samples=5, multiplier=3, min_deadline=1)
+    for _ in range(4):
+        tracker.add('k', 2.0)
+    assert tracker.quantile('k', 0.99) is None
+    assert tracker.deadline('k', 300) == 300
+
+
+def test_prazo_e_p99_vezes_multiplicador_entre_o_minimo_e_o_fixo():
+    tracker = LatencyTracker(min_samples=5, multiplier=3, min_deadline=1)
+    for seconds in (1.0, 1.0, 1.0, 1.0, 4.0):
+        tracker.add('k', seconds)
+    assert tracker.deadline('k', 300) == 12.0
+    assert tracker.deadline('k', 10) == 10
+    for _ in range(5):
+        tracker.add('rapido', 0.01)
+    assert tracker.deadline('rapido', 300) == 1
+
+
+def test_janela_guarda_so_as_ultimas_amostras():
+    tracker = LatencyTracker(window=3, min_samples=3)
+    for seconds in (100, 1, 1, 1):
+        tracker.add('k', seconds)
+    assert tracker.quantile('k', 0.99) == 1
+
+
+def test_hedge_depois_do_p95_usa_a_resposta_mais_rapida_e_fecha_a_outra():
+    client = WebhookClient(hedge_max_ratio=1.0)
+    com_historico(client, 'shape', 0.01)
+    lenta, rapida = resposta(), resposta()
+    liberar = threading.Event()
+
+    def post(*args, **kwargs):
+        if post.calls == 0:
+            post.calls += 1
+            liberar.wait(5)
+            return lenta
+        post.calls += 1
+        return rapida
+    post.calls = 0
+
+    with mock.patch.object(client.session, 'post', side_effect=post):
+        assert client.post_json(URL, {}, shape='shape') is rapida
+        liberar.set()
+        for _ in range(100):
+            if lenta.close.called:
+                break
+            time.sleep(0.01)
+    assert client.stats['hedges'] == 1 and client.stats['hedge_wins'] == 1
+    assert lenta.close.called and not rapida.close.called
+
+
+def test_hedge_respeita_o_orcamento():
+    client = WebhookClient(hedge_max_ratio=0.0)
+    com_historico(client, 'shape', 0.001)
+    with mock.patch.object(client.session, 'post', return_value=resposta()) as post:
+        client.post_json(URL, {}, shape='shape')
+    assert post.call_count == 1 and client.stats['hedges'] == 0
+
+
+def test_prazo_adaptativo_estourado_refaz_com_o_prazo_fixo_sem_contar_falha():
+    client = WebhookClient(max_retries=0, hedge_max_ratio=0.0)
+    client.latency = LatencyTracker(min_samples=20, min_deadline=0.01)
+    com_historico(client, 'shape', 0.01)
+    client.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    with mock.patch.object(client.session, 'post', side_effect=requests.exceptions.ConnectionError()):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.post_json(URL, {})
+    assert client.breaker.state == 'open'
+
+    # A requisição de teste do circuito meio aberto também pode ser refeita com o prazo fixo
+    with mock.patch.object(client.session, 'post',
+                           side_effect=[requests.exceptions.ReadTimeout(), resposta()]) as post:
+        assert client.post_json(URL, {}, shape='shape').status_code == 200
+    deadlines = [call.kwargs['timeout'][1] for call in post.call_args_list]
+    assert deadlines == [pytest.approx(0.03), client.read_timeout]
+    assert client.breaker.state == 'closed'
+
+
+def test_timeout_com_o_prazo_fixo_nao_e_repetido():
+    client = WebhookClient(max_retries=3, hedge_max_ratio=0.0)
+    with mock.patch.object(client.session, 'post', side_effect=requests.exceptions.ReadTimeout()) as post:
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            client.post_json(URL, {}, shape='shape')
+    assert post.call_count == 1
+    assert client.breaker.failures == 1
@@ -0,0 +1,131 @@
+"""Resultados compartilhados entre sessões: single-flight, LRU e validade."""
+
+import threading
+import time
+
+from lead_generator.results import SharedResults
+
+
+def carregar_em_paralelo(results, key, loader, n):
+    """Chama results.load(key, loader) em n threads; retorna os resultados (ou exceções) de cada uma"""
+    outcomes = [None] * n
+
+    def run(i):
+        try:
+            outcomes[i] = results.load(key, loader)
+        except Exception as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def esperar_coalescidas(results, n):
+    for _ in range(200):
+        if results.stats['coalesced'] >= n:
+            return
+        time.sleep(0.005)
+    raise AssertionError("as cargas simultâneas não foram agrupadas")
+
+
+def test_cargas_simultaneas_da_mesma_chave_viram_uma_so():
+    results = SharedResults()
+    liberar = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        liberar.wait(5)
+        return [{'link': 'a'}]
+
+    threads, outcomes = carregar_em_paralelo(results, 'k', loader, 4)
+    esperar_coalescidas(results, 3)
+    liberar.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(origem for _, origem in outcomes) == ['coalesced'] * 3 + ['loaded']
+    assert len({id(entry) for entry, _ in outcomes}) == 1
+    assert results.load('k', loader) == (outcomes[0][0], 'hit')
+
+
+def test_erro_do_lider_chega_a_quem_esperava_e_nada_fica_guardado():
+    results = SharedResults()
+    liberar = threading.Event()
+
+    def loader():
+        liberar.wait(5)
+        raise RuntimeError("N8N fora do ar")
+
+    threads, outcomes = carregar_em_paralelo(results, 'k', loader, 3)
+    esperar_coalescidas(results, 2)
+    liberar.set()
+    for thread in threads:
+        thread.join()
+
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert results.get('k') is None
+    entry, origem = results.load('k', lambda: [{'link': 'b'}])
+    assert origem == 'loaded' and entry.leads == ({'link': 'b'},)
+
+
+def test_loader_e_chamado_fora_do_lock():
+    # Uma carga lenta de uma chave não pode bloquear outra chave
+    results = SharedResults()
+    liberar = threading.Event()
+    threads, _ = carregar_em_paralelo(results, 'lenta', lambda: liberar.wait(5) and [], 1)
+    entry, origem = results.load('rapida', lambda: [1])
+    assert origem == 'loaded'
+    liberar.set()
+    threads[0].join()
+
+
+def test_expira_pelo_ttl_e_pelo_max_age_de_quem_pede():
+    results = SharedResults(ttl_seconds=60)
+    results.publish('k', [1])
+    assert results.get('k').leads == (1,)
+    assert results.get('k', max_age=0) is None
+    assert results.get('k').leads == (1,)  # max_age não apaga o resultado para os demais
+
+    entry, origem = results.load('k', lambda: [2], max_age=0)
+    assert origem == 'loaded' and results.get('k').leads == (2,)
+
+    results.ttl_seconds = 0
+    time.sleep(0.01)
+    assert results.get('k') is None
+
+
+def test_lru_descarta_os_menos_usados():
+    results = SharedResults(max_entries=2)
+    results.publish('a', [1])
+    results.publish('b', [2])
+    results.get('a')
+    results.publish('c', [3])
+    assert results.get('b') is None
+    assert results.get('a') is not None and results.get('c') is not None
+
+
+def test_publish_reaproveita_resultado_igual():
+    results = SharedResults()
+    first = results.publish('k', [1, 2])
+    assert results.publish('k', [1, 2]) is first
+    assert results.publish('k', [3]) is not first
+
+
+def test_derive_monta_uma_vez():
+    results = SharedResults()
+    entry = results.publish('k', [1])
+    calls = []
+    for _ in range(3):
+        entry.derive('tabela', lambda: calls.append(1) or len(calls))
+    assert calls == [1]
+
+
+def test_estatisticas():
+    results = SharedResults()
+    for _ in range(3):
+        results.load('k', lambda: [])
+    assert results.stats == {'hits': 2, 'coalesced': 0, 'loads': 1}
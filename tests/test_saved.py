@@ -0,0 +1,128 @@
+"""Buscas salvas: perfis novos entre atualizações e agendamento sem execuções em dobro."""
+
+import threading
+from datetime import datetime
+
+import pytest
+
+from lead_generator.saved import SavedSearchStore, proxima_execucao
+
+PAYLOAD = {'query': 'x', 'num_results': 10, 'start_page': 0, 'location': 'Brasil',
+           'executive_terms': ['CEO'], 'sector': 'Todos os setores'}
+
+
+def lead(name):
+    return {'titulo': name, 'link': f"https://br.linkedin.com/in/{name}"}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "saved.sqlite3")
+
+
+def test_so_perfis_ainda_nao_vistos_sao_novos(db_path):
+    store = SavedSearchStore(db_path)
+    saved_id = store.save(PAYLOAD, 0)
+    assert store.record_run(saved_id, [lead('a'), lead('b')]) == [lead('a'), lead('b')]
+    assert store.record_run(saved_id, [lead('b'), lead('c'), lead('a')]) == [lead('c')]
+    assert store.last_new_leads(saved_id) == [lead('c')]
+    saved = store.get(saved_id)
+    assert (saved['last_total'], saved['last_new']) == (3, 1)
+
+
+def test_link_normalizado_e_duplicados_na_mesma_execucao(db_path):
+    store = SavedSearchStore(db_path)
+    saved_id = store.save(PAYLOAD, 0)
+    store.record_run(saved_id, [lead('a')])
+    variantes = [{'link': "http://www.linkedin.com/in/a/?trk=x"}, lead('d'), {'link': "https://linkedin.com/in/d/"}]
+    assert store.record_run(saved_id, variantes) == [lead('d')]
+
+
+def test_leads_sem_link_nunca_sao_novos(db_path):
+    store = SavedSearchStore(db_path)
+    saved_id = store.save(PAYLOAD, 0)
+    assert store.record_run(saved_id, [{'titulo': 'sem link'}]) == []
+
+
+def test_baseline_conta_como_visto_so_na_criacao(db_path):
+    store = SavedSearchStore(db_path)
+    saved_id = store.save(PAYLOAD, 0, baseline=[lead('a')])
+    assert store.save(PAYLOAD, 0, baseline=[lead('b')]) == saved_id
+    assert store.record_run(saved_id, [lead('a'), lead('b')]) == [lead('b')]
+
+
+def test_vistos_sao_por_busca_e_persistem(db_path):
+    store = SavedSearchStore(db_path)
+    first = store.save(PAYLOAD, 0)
+    second = store.save(PAYLOAD, 1)
+    store.record_run(first, [lead('a')])
+    assert store.record_run(second, [lead('a')]) == [lead('a')]
+    assert SavedSearchStore(db_path).record_run(first, [lead('a')]) == []
+
+
+def test_guarda_so_as_ultimas_execucoes(db_path):
+    store = SavedSearchStore(db_path, runs_kept=2)
+    saved_id = store.save(PAYLOAD, 0)
+    for name in 'abcd':
+        store.record_run(saved_id, [lead(name)])
+    count = store._conn.execute("SELECT COUNT(*) FROM runs WHERE saved_id = ?", (saved_id,)).fetchone()[0]
+    assert count == 2
+    assert store.last_new_leads(saved_id) == [lead('d')]
+
+
+def test_remove_apaga_vistos_e_execucoes(db_path):
+    store = SavedSearchStore(db_path)
+    saved_id = store.save(PAYLOAD, 0)
+    store.record_run(saved_id, [lead('a')])
+    store.remove(saved_id)
+    assert store.get(saved_id) is None
+    assert store.save(PAYLOAD, 0) == saved_id
+    assert store.record_run(saved_id, [lead('a')]) == [lead('a')]
+
+
+def test_proxima_execucao_e_sempre_no_futuro():
+    now = datetime(2024, 5, 10, 14, 30).timestamp()
+    assert datetime.fromtimestamp(proxima_execucao(15, now)) == datetime(2024, 5, 10, 15)
+    assert datetime.fromtimestamp(proxima_execucao(14, now)) == datetime(2024, 5, 11, 14)
+    assert datetime.fromtimestamp(proxima_execucao(14, datetime(2024, 5, 10, 14).timestamp())) == datetime(2024, 5, 11, 14)
+
+
+def test_claim_due_reserva_o_proximo_horario(db_path):
+    store = SavedSearchStore(db_path)
+    saved_id = store.save(PAYLOAD, 0)
+    store.set_schedule(saved_id, 3)
+    due_at = store.get(saved_id)['next_run_at']
+    assert store.claim_due(due_at - 1) == []
+    claimed = store.claim_due(due_at)
+    assert [saved['id'] for saved in claimed] == [saved_id]
+    assert store.get(saved_id)['next_run_at'] > due_at
+    assert store.claim_due(due_at) == []
+
+    store.set_schedule(saved_id, None)
+    assert store.claim_due(due_at + 10 * 86400) == []
+
+
+def test_claim_due_concorrente_entrega_cada_busca_uma_vez(db_path):
+    # Agendador do dashboard e cron da CLI (conexões diferentes ao mesmo arquivo) disputando as mesmas buscas
+    setup = SavedSearchStore(db_path)
+    ids = []
+    for page in range(5):
+        saved_id = setup.save(PAYLOAD, page)
+        setup.set_schedule(saved_id, 3)
+        ids.append(saved_id)
+    now = max(setup.get(saved_id)['next_run_at'] for saved_id in ids)
+
+    stores = [SavedSearchStore(db_path) for _ in range(6)]
+    barrier = threading.Barrier(len(stores))
+    claims = []
+
+    def claim(store):
+        barrier.wait()
+        claims.extend(saved['id'] for saved in store.claim_due(now))
+
+    threads = [threading.Thread(target=claim, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claims) == sorted(ids)
@@ -0,0 +1,88 @@
+"""Leitura incremental das respostas do webhook: o resultado não pode depender de onde os blocos são cortados."""
+
+import json
+
+import pytest
+
+from lead_generator.core import extrair_leads
+from lead_generator.streaming import JsonLeadParser, NdjsonLeadParser, ler_leads, parser_para
+
+LEADS = [
+    {'titulo': "Márcia - CEO - Saúde+ | LinkedIn", 'link': "https://br.linkedin.com/in/marcia", 'score': 1.5,
+     'tags': ["a", "b"], 'extra': {'n': 12, 'ok': True, 'nada': None}},
+    {'titulo': "José - CMO", 'link': "https://br.linkedin.com/in/jose", 'score': -20, 'resumo': "aspas \" e \\ barra"},
+    {'titulo': "Ana", 'link': "https://br.linkedin.com/in/ana", 'score': 3e2, 'analise': "Potencial ALTO 🚀"},
+]
+
+RESPOSTAS = {
+    'lista': {'leads': LEADS},
+    'data': {'leads': {'data': LEADS}},
+    'um_lead': {'leads': LEADS[0]},
+    'data_depois': {'leads': {'titulo': "x", 'data': LEADS}},
+    'outras_chaves_antes': {'ok': True, 'meta': {'leads': []}, 'leads': LEADS, 'depois': [1, 2]},
+    'sem_leads': {'status': "vazio"},
+}
+
+
+def em_blocos(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def ler(data, content_type, size):
+    return [lead for batch in ler_leads(em_blocos(data, size), content_type) for lead in batch]
+
+
+@pytest.mark.parametrize('shape', list(RESPOSTAS))
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, 100000])
+def test_json_agregado_igual_a_extrair_leads_em_qualquer_corte(shape, size):
+    body = json.dumps(RESPOSTAS[shape], ensure_ascii=False, indent=1).encode('utf-8')
+    expected = extrair_leads(RESPOSTAS[shape])
+    assert ler(body, 'application/json; charset=utf-8', size) == (expected if isinstance(expected, list) else [expected])
+
+
+@pytest.mark.parametrize('size', [1, 5, 64, 100000])
+def test_ndjson_em_qualquer_corte(size):
+    body = "".join(json.dumps(lead, ensure_ascii=False) + "\n" for lead in LEADS).encode('utf-8')
+    assert ler(body, 'application/x-ndjson', size) == LEADS
+
+
+def test_ndjson_sem_quebra_de_linha_no_fim_e_com_linhas_vazias():
+    body = ("\n" + json.dumps(LEADS[0]) + "\r\n\n" + json.dumps(LEADS[1])).encode('utf-8')
+    assert ler(body, 'application/x-ndjson', 4) == LEADS[:2]
+
+
+def test_ndjson_aceita_linhas_no_formato_agregado_e_json_seq():
+    body = ("\x1e" + json.dumps({'leads': {'data': LEADS[:2]}}) + "\n" + json.dumps(LEADS[2]) + "\n").encode('utf-8')
+    assert ler(body, 'application/json-seq', 3) == LEADS
+
+
+def test_leads_saem_assim_que_terminam_de_chegar():
+    body = json.dumps({'leads': LEADS})
+    first_end = body.index(json.dumps(LEADS[0])) + len(json.dumps(LEADS[0]))
+    parser = JsonLeadParser()
+    assert parser.feed(body[:first_end - 1]) == []
+    assert parser.feed(body[first_end - 1:first_end + 1]) == [LEADS[0]]
+    assert parser.feed(body[first_end + 1:]) == LEADS[1:]
+    assert parser.close() == []
+
+
+@pytest.mark.parametrize('body', ['{"leads": [{"a": 1}, {"b": 2}', '{"leads": [1.', '{"lea'])
+def test_json_truncado_e_erro(body):
+    parser = JsonLeadParser()
+    parser.feed(body)
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_numero_cortado_no_fim_do_bloco_espera_o_resto():
+    parser = JsonLeadParser()
+    assert parser.feed('{"leads": {"data": [1') == []
+    assert parser.feed('2.5') == []
+    assert parser.feed(']}') == [12.5]
+
+
+def test_parser_pelo_content_type():
+    assert isinstance(parser_para('application/x-ndjson; charset=utf-8'), NdjsonLeadParser)
+    assert isinstance(parser_para('Application/JSONL'), NdjsonLeadParser)
+    assert isinstance(parser_para('application/json'), JsonLeadParser)
+    assert isinstance(parser_para(None), JsonLeadParser)